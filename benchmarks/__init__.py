@@ -0,0 +1,9 @@
+# benchmarks — microbenchmarks of the solver's hot functions on synthetic tasks
+#
+#   python -m arc_solver.benchmarks                 run, write results.json
+#   python -m arc_solver.benchmarks --save-baseline run, also store baseline.json
+#   python -m arc_solver.benchmarks --compare       run, flag regressions vs baseline.json
+#   python -m arc_solver.benchmarks.objects         find_objects vs the reference flood fill
+#
+# synth.make_task() generates seeded ARC-style tasks; bench.run() times each
+# hot function at several scales (see bench.SCALES).
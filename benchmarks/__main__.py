@@ -0,0 +1,3 @@
+from arc_solver.benchmarks.bench import main
+
+raise SystemExit(main())
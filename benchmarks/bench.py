@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# bench.py — time the solver's hot functions on synthetic tasks
+#
+# Every case is timed at each scale in SCALES on the same seeded tasks: an
+# untimed setup builds fresh arguments, then one run calls the function on
+# every task of the scale.  Each case gets `repeat` runs after a warm-up;
+# results (min / median seconds per run) are written as JSON and can be
+# compared with a saved baseline: a case whose median is more than
+# `tolerance` slower is reported as a regression (exit status 1).
+#
+# State files and ledgers the functions touch are redirected to a temporary
+# directory and never flushed (STORE.read_only), so benchmarking leaves the
+# solver's memory untouched.
+
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+import statistics
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
+from arc_solver.benchmarks.synth import make_tasks
+
+RESULTS_PATH = Path(__file__).parent / "results.json"
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+SCALES = {
+    "small":  {"size": 5,  "pairs": 2, "colors": 3,  "density": 0.3},
+    "medium": {"size": 15, "pairs": 3, "colors": 6,  "density": 0.4},
+    "large":  {"size": 30, "pairs": 4, "colors": 10, "density": 0.5},
+}
+TASKS_PER_SCALE = 8
+N_CANDIDATES = 32   # ensemble_predict pool: the true maps + random ones + identity
+
+# ---------------- isolation ----------------
+def _sandbox(tmp: Path):
+    """Point every loaded arc_solver module's state/ledger path constants into `tmp`."""
+    from arc_solver.state_store import STORE
+    STORE.read_only = True
+    for name, mod in list(sys.modules.items()):
+        if not name.startswith("arc_solver.") or name.startswith("arc_solver.benchmarks"):
+            continue
+        for attr, val in list(vars(mod).items()):
+            if attr.isupper() and isinstance(val, Path) and val.suffix:
+                setattr(mod, attr, tmp / f"{name.rsplit('.', 1)[-1]}.{val.name}")
+
+# ---------------- cases ----------------
+def _grids(tasks, key="input") -> List[np.ndarray]:
+    return [np.array(p[key], dtype=np.uint8) for t in tasks for p in t["train"]]
+
+def _candidates(tasks, rng: random.Random) -> List[Dict[str, Any]]:
+    from arc_solver.step0_colormap import ColorMap
+    cands = [{"type": "identity", "color_map": ColorMap.identity(), "confidence": 0.5,
+              "source": "fallback:identity"}]
+    for t in tasks:
+        x = np.concatenate([np.ravel(p["input"]) for p in t["train"]])
+        y = np.concatenate([np.ravel(p["output"]) for p in t["train"]])
+        cands.append({"type": "cache", "color_map": ColorMap.from_lut(*_joint_map(x, y)),
+                      "confidence": 0.8, "source": f"cache:{t['id']}"})
+    while len(cands) < N_CANDIDATES:
+        cands.append({"type": "color_map_meta",
+                      "color_map": ColorMap.from_lut([rng.randrange(10) for _ in range(10)],
+                                                     [rng.random() < 0.5 for _ in range(10)]),
+                      "confidence": round(rng.uniform(0.5, 0.95), 3), "source": f"meta:{len(cands)}"})
+    return cands
+
+def _joint_map(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    joint = np.bincount(x * 10 + y, minlength=100).reshape(10, 10)
+    return joint.argmax(axis=1), joint.any(axis=1)
+
+def _results(tasks) -> Dict[str, Any]:
+    """A submission with a few defects for validate_and_fix to repair."""
+    out = {}
+    for i, t in enumerate(tasks):
+        preds = [[s["input"], s["input"]] for s in t["test"]]
+        if i % 3 == 1:
+            preds = [p[:1] for p in preds]            # one attempt missing
+        if i % 3 != 2:
+            out[t["id"]] = preds                      # every third task missing
+    return out
+
+def cases() -> Dict[str, Callable[[List[Dict[str, Any]]], Callable[[], Any]]]:
+    """name → setup(tasks) returning the zero-argument run to time."""
+    from arc_solver.step1_objects import find_objects
+    from arc_solver.step3_learn import learn_from_pairs
+    from arc_solver.step12_self_corrector import apply_self_correction   # the one solve_task calls
+    from arc_solver.step23_meta_ensemble import ensemble_predict
+    from arc_solver.step24_check_submission import validate_and_fix
+
+    def objects(tasks):
+        grids = _grids(tasks)
+        return lambda: [find_objects(g) for g in grids]
+
+    def learn(tasks):
+        return lambda: [learn_from_pairs(t["train"]) for t in tasks]
+
+    def ensemble(tasks):
+        cands = _candidates(tasks, random.Random(len(tasks)))
+        return lambda: [ensemble_predict(t, topk=2, cands=cands) for t in tasks]
+
+    def self_correct(tasks):
+        # as in solve_task: the task's base color map, here with half its pairs missing
+        maps = []
+        for t in tasks:
+            lut, defined = _joint_map(np.concatenate([np.ravel(p["input"]) for p in t["train"]]),
+                                      np.concatenate([np.ravel(p["output"]) for p in t["train"]]))
+            maps.append({int(k): int(lut[k]) for k in np.flatnonzero(defined)[::2]})
+        return lambda: [apply_self_correction(t, [m]) for t, m in zip(tasks, maps)]
+
+    def submission(tasks):
+        results = _results(tasks)
+        return lambda: validate_and_fix(results, tasks)
+
+    return {"find_objects": objects, "learn_from_pairs": learn, "ensemble_predict": ensemble,
+            "apply_self_correction": self_correct, "validate_and_fix": submission}
+
+# ---------------- timing ----------------
+def _time(setup: Callable[[], Callable[[], Any]], repeat: int) -> List[float]:
+    times = []
+    sink = io.StringIO()
+    for i in range(repeat + 1):                       # first run is the warm-up
+        fn = setup()
+        with contextlib.redirect_stdout(sink):
+            t0 = time.perf_counter()
+            fn()
+            dt = time.perf_counter() - t0
+        sink.seek(0)
+        sink.truncate()
+        if i:
+            times.append(dt)
+    return times
+
+def run(repeat: int = 5, seed: int = 0, scales: List[str] = None, only: List[str] = None) -> Dict[str, Any]:
+    """Time every case at every scale; returns the results document."""
+    tmp = Path(tempfile.mkdtemp(prefix="arc_bench_"))
+    todo = cases()
+    _sandbox(tmp)
+    out: Dict[str, Any] = {}
+    for scale in scales or list(SCALES):
+        tasks = make_tasks(TASKS_PER_SCALE, seed=seed, **SCALES[scale])
+        for name, setup in todo.items():
+            if only and name not in only:
+                continue
+            times = _time(lambda: setup(tasks), repeat)
+            out[f"{name}/{scale}"] = {"median_s": statistics.median(times), "min_s": min(times),
+                                      "runs": len(times), "tasks": len(tasks)}
+            print(f"[BENCH] {name:22s} {scale:6s} median={out[f'{name}/{scale}']['median_s'] * 1e3:9.3f} ms")
+    return {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "seed": seed, "repeat": repeat,
+                     "python": platform.python_version(), "numpy": np.__version__,
+                     "machine": platform.machine(), "scales": {s: SCALES[s] for s in scales or SCALES}},
+            "results": out}
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2) -> List[Dict[str, Any]]:
+    """Cases whose median is more than `tolerance` (fraction) slower than the baseline."""
+    regressions = []
+    base = baseline.get("results", {})
+    for case, rec in current.get("results", {}).items():
+        if case not in base or base[case]["median_s"] <= 0:
+            continue
+        ratio = rec["median_s"] / base[case]["median_s"]
+        print(f"[BENCH] {case:30s} {ratio:6.2f}x baseline")
+        if ratio > 1.0 + tolerance:
+            regressions.append({"case": case, "ratio": round(ratio, 3),
+                                "median_s": rec["median_s"], "baseline_s": base[case]["median_s"]})
+    return regressions
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m arc_solver.benchmarks", description=__doc__)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--scale", action="append", choices=list(SCALES), help="repeatable (default: all)")
+    ap.add_argument("--case", action="append", help="only these functions (repeatable)")
+    ap.add_argument("--out", type=Path, default=RESULTS_PATH)
+    ap.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    ap.add_argument("--save-baseline", action="store_true", help="also store the results as the baseline")
+    ap.add_argument("--compare", action="store_true", help="flag regressions against the baseline")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown fraction (0.2 = 20%%)")
+    args = ap.parse_args(argv)
+
+    doc = run(repeat=args.repeat, seed=args.seed, scales=args.scale, only=args.case)
+    args.out.write_text(json.dumps(doc, indent=2))
+    print(f"[BENCH] Results written → {args.out}")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(doc, indent=2))
+        print(f"[BENCH] Baseline saved → {args.baseline}")
+    if args.compare:
+        if not args.baseline.exists():
+            print(f"[BENCH] No baseline at {args.baseline}")
+            return 1
+        regressions = compare(doc, json.loads(args.baseline.read_text()), args.tolerance)
+        for r in regressions:
+            print(f"[BENCH] REGRESSION {r['case']}: {r['ratio']:.2f}x ({r['baseline_s'] * 1e3:.3f} → {r['median_s'] * 1e3:.3f} ms)")
+        print(f"[BENCH] {len(regressions)} regressions beyond {args.tolerance:.0%}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# objects.py — find_objects against the pixel-by-pixel flood fill it replaced
+#
+#   python -m arc_solver.benchmarks.objects
+#
+# Times both on random grids of several sizes, densities and color counts
+# and checks that they find the same objects.
+
+import time
+from typing import Dict, List
+import numpy as np
+from arc_solver.step0_utils import ensure_integrity
+from arc_solver.step1_objects import find_objects
+
+def find_objects_flood(grid: np.ndarray) -> List[Dict]:
+    """Reference pixel-by-pixel flood fill (4-neighbor): find_objects before labeling."""
+    g = ensure_integrity(grid)
+    h, w = g.shape
+    visited = np.zeros((h, w), dtype=bool)
+    objects = []
+    obj_id = 0
+
+    for y in range(h):
+        for x in range(w):
+            if g[y, x] == 0 or visited[y, x]:
+                continue
+            stack = [(y, x)]
+            visited[y, x] = True
+            pixels = []
+            color_counts = {}
+            y1 = y2 = y
+            x1 = x2 = x
+
+            while stack:
+                cy, cx = stack.pop()
+                pixels.append((cy, cx))
+                val = int(g[cy, cx])
+                color_counts[val] = color_counts.get(val, 0) + 1
+                y1, y2 = min(y1, cy), max(y2, cy)
+                x1, x2 = min(x1, cx), max(x2, cx)
+                for ny, nx in ((cy-1,cx),(cy+1,cx),(cy,cx-1),(cy,cx+1)):
+                    if 0<=ny<h and 0<=nx<w and not visited[ny,nx] and g[ny,nx]!=0:
+                        visited[ny,nx]=True
+                        stack.append((ny,nx))
+
+            mask = np.zeros((y2-y1+1, x2-x1+1), bool)
+            for py, px in pixels:
+                mask[py-y1, px-x1] = True
+
+            dom_color = max(color_counts, key=color_counts.get)
+            centroid = (
+                float(np.mean([p[0] for p in pixels])),
+                float(np.mean([p[1] for p in pixels]))
+            )
+
+            # rotation/mirror signatures for later matching
+            sig_rot90 = np.rot90(mask)
+            sig_mirror = np.fliplr(mask)
+
+            objects.append({
+                "id": obj_id,
+                "bbox": (y1, x1, y2+1, x2+1),
+                "mask": mask,
+                "colors": color_counts,
+                "dominant": dom_color,
+                "centroid": centroid,
+                "sig_rot90": sig_rot90,
+                "sig_mirror": sig_mirror,
+            })
+            obj_id += 1
+
+    return objects
+
+def same_objects(a: List[Dict], b: List[Dict]) -> bool:
+    """Same objects; "colors" is compared as a mapping (find_objects may key it in another order)."""
+    if len(a) != len(b):
+        return False
+    for p, q in zip(a, b):
+        for k in ("id", "bbox", "colors", "dominant", "centroid"):
+            if p[k] != q[k]:
+                return False
+        for k in ("mask", "sig_rot90", "sig_mirror"):
+            if not np.array_equal(p[k], q[k]):
+                return False
+    return True
+
+def benchmark(sizes=(5, 10, 20, 30), densities=(0.3, 0.6), colors=(1, 9), reps: int = 20, seed: int = 0):
+    """Time find_objects against the flood-fill reference and check the outputs agree."""
+    rng = np.random.default_rng(seed)
+    print(f"{'size':>6} {'dens':>5} {'cols':>5} {'flood ms':>9} {'label ms':>9} {'speedup':>8} {'equal':>6}")
+    for n, d, nc in ((n, d, nc) for n in sizes for d in densities for nc in colors):
+        grids = [np.where(rng.random((n, n)) < d, rng.integers(1, nc + 1, (n, n)), 0) for _ in range(reps)]
+        t0 = time.perf_counter()
+        ref = [find_objects_flood(g) for g in grids]
+        t1 = time.perf_counter()
+        new = [find_objects(g) for g in grids]
+        t2 = time.perf_counter()
+        equal = all(same_objects(a, b) for a, b in zip(ref, new))
+        f_ms, l_ms = (t1 - t0) * 1e3 / reps, (t2 - t1) * 1e3 / reps
+        print(f"{n:>6} {d:>5.2f} {nc:>5} {f_ms:>9.3f} {l_ms:>9.3f} {f_ms / max(l_ms, 1e-9):>7.1f}x {str(equal):>6}")
+
+if __name__ == "__main__":
+    benchmark()
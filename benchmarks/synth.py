@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# synth.py — seeded synthetic ARC task generator
+#
+# A task's grids are a background (color 0) with axis-aligned rectangles of
+# colors 1..colors-1 dropped on until `density` of the cells are covered.
+# Outputs are the inputs under one random color permutation of the task
+# (background fixed), so the color-map learners have a rule to find.
+
+import random
+from typing import Any, Dict, List, Tuple, Union
+import numpy as np
+
+MAX_SIZE = 30   # ARC grids are at most 30×30
+
+def _shape(size: Union[int, Tuple[int, int]]) -> Tuple[int, int]:
+    h, w = (size, size) if isinstance(size, int) else size
+    if not (1 <= h <= MAX_SIZE and 1 <= w <= MAX_SIZE):
+        raise ValueError(f"grid size {h}x{w} outside 1..{MAX_SIZE}")
+    return h, w
+
+def random_grid(rng: random.Random, size: Union[int, Tuple[int, int]], colors: int = 4,
+                density: float = 0.3) -> np.ndarray:
+    """uint8 grid with rectangles of colors 1..colors-1 covering ~`density` of it."""
+    h, w = _shape(size)
+    grid = np.zeros((h, w), dtype=np.uint8)
+    if colors < 2:
+        return grid
+    target = min(1.0, max(0.0, density)) * h * w
+    for _ in range(4 * h * w):                       # bounded: density may be unreachable
+        if np.count_nonzero(grid) >= target:
+            break
+        rh, rw = rng.randint(1, max(1, h // 3)), rng.randint(1, max(1, w // 3))
+        r, c = rng.randrange(h - rh + 1), rng.randrange(w - rw + 1)
+        grid[r:r + rh, c:c + rw] = rng.randint(1, colors - 1)
+    return grid
+
+def make_task(seed: int, size: Union[int, Tuple[int, int]] = 10, pairs: int = 3,
+              colors: int = 4, density: float = 0.3, tests: int = 1) -> Dict[str, Any]:
+    """One task (merged-dataset format, with "id") from `seed`."""
+    if not 2 <= colors <= 10:
+        raise ValueError(f"colors={colors} outside 2..10")
+    rng = random.Random(seed)
+    perm = [0] + rng.sample(range(1, colors), colors - 1)
+    lut = np.array(perm + list(range(colors, 10)), dtype=np.uint8)
+
+    def pair() -> Dict[str, List[List[int]]]:
+        g = random_grid(rng, size, colors, density)
+        return {"input": g.tolist(), "output": lut[g].tolist()}
+
+    return {"id": f"synth_{seed:08x}",
+            "train": [pair() for _ in range(pairs)],
+            "test": [pair() for _ in range(tests)]}
+
+def make_tasks(n: int, seed: int = 0, **params) -> List[Dict[str, Any]]:
+    """`n` tasks with consecutive seeds (params as for make_task)."""
+    return [make_task(seed + i, **params) for i in range(n)]
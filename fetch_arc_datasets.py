@@ -1,53 +1,264 @@
 #!/usr/bin/env python3
 # fetch_arc_datasets.py — unified dataset loader and merger
+#
+# The official challenge files map task id → task.  They are parsed one task
+# at a time and appended to an append-only merged store:
+#
+#   merged_dataset.jsonl   one task per line (with its "id")
+#   merged_index.json      id → {hash, offset, length, split}, in merge order
+#
+# A task is only appended when its content hash is new or has changed, so
+# re-running the fetch on unchanged files writes nothing.
+#
+# The merged store is then converted to a memory-mapped binary pack
+# (merged_dataset.pack, see task_pack), rebuilt whenever the store changes.
+# stream_tasks() serves tasks from the pack, or one at a time from the store
+# when no pack can be built (ARC_TASK_PACK=0 disables packing).
 
+import os
 import json
+import hashlib
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from arc_solver.task_pack import TaskPack, build_pack, open_pack, pack_source
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 TRAIN_PATH = WORK / "arc-agi_training_challenges.json"
 TEST_PATH  = WORK / "arc-agi_test_challenges.json"
-MERGED_PATH = WORK / "merged_dataset.json"
+MERGED_PATH = WORK / "merged_dataset.json"     # legacy whole-file store (read-only fallback)
+MERGED_JSONL = WORK / "merged_dataset.jsonl"
+MERGED_INDEX = WORK / "merged_index.json"
+PACK_PATH = WORK / "merged_dataset.pack"
+READ_CHUNK = 1 << 16
+USE_PACK = os.environ.get("ARC_TASK_PACK", "1") != "0"
 
-def _load_json(path: Path):
-    """Load a JSON file; tolerate single dicts and empty content."""
+# ---------------- streaming parse ----------------
+def iter_json_tasks(path: Path) -> Iterator[Tuple[Any, Any]]:
+    """
+    Yield (task_id, task) from a challenge file without loading it whole.
+    Accepts the official {id: task} mapping, a list of tasks, or a single task.
+    """
     if not path.exists():
-        return []
+        return
+    dec = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def more() -> bool:
+            nonlocal buf, pos, eof
+            data = f.read(READ_CHUNK)
+            if not data:
+                eof = True
+                return False
+            buf, pos = buf[pos:] + data, 0
+            return True
+
+        def skip_ws() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if not more():
+                    return ""
+
+        def value():
+            nonlocal pos
+            while True:
+                try:
+                    v, end = dec.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not more():
+                        raise
+                    continue
+                if end == len(buf) and not eof and more():
+                    continue    # a trailing number may continue in the next chunk
+                pos = end
+                return v
+
+        def expect(ch: str):
+            nonlocal pos
+            if skip_ws() != ch:
+                raise json.JSONDecodeError(f"expected {ch!r}", buf, pos)
+            pos += 1
+
+        head = skip_ws()
+        if head == "[":
+            pos += 1
+            while skip_ws() not in ("]", ""):
+                task = value()
+                yield (task.get("id") if isinstance(task, dict) else None), task
+                if skip_ws() == ",":
+                    pos += 1
+        elif head == "{":
+            pos += 1
+            first = True
+            while skip_ws() not in ("}", ""):
+                key = value()
+                expect(":")
+                skip_ws()
+                task = value()
+                if first and not isinstance(task, dict):
+                    # not an id → task mapping: the file is a single task
+                    f.seek(0)
+                    single = json.load(f)
+                    yield single.get("id"), single
+                    return
+                first = False
+                yield key, task
+                if skip_ws() == ",":
+                    pos += 1
+
+def _task_hash(task: Dict[str, Any]) -> str:
+    raw = json.dumps(task, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+# ---------------- merged store ----------------
+def _load_index() -> Dict[str, Dict[str, Any]]:
     try:
-        text = path.read_text().strip()
-        if not text:
-            return []
-        data = json.loads(text)
-        if isinstance(data, dict):
-            return [data]
-        if isinstance(data, list):
-            return data
+        if MERGED_INDEX.exists() and MERGED_JSONL.exists():
+            with open(MERGED_INDEX) as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"[WARN] Could not load {MERGED_INDEX.name}: {e}")
+    return {}
+
+def _save_index(index: Dict[str, Dict[str, Any]]):
+    tmp = MERGED_INDEX.with_name(MERGED_INDEX.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp, MERGED_INDEX)
+
+def _ingest(path: Path, split: str, required: str, index: Dict[str, Dict[str, Any]], out) -> Tuple[List[str], int]:
+    """Append new/changed tasks of one challenge file; returns (valid ids, appended count)."""
+    ids, appended = [], 0
+    try:
+        for key, task in iter_json_tasks(path):
+            if not isinstance(task, dict) or required not in task:
+                continue    # malformed or empty task
+            task.setdefault("id", key if key is not None else f"{split}_{len(ids)}")
+            tid = str(task["id"])
+            ids.append(tid)
+            digest = _task_hash(task)
+            if index.get(tid, {}).get("hash") == digest:
+                continue
+            line = (json.dumps(task, separators=(",", ":")) + "\n").encode("utf-8")
+            offset = out.tell()
+            out.write(line)
+            index[tid] = {"hash": digest, "offset": offset, "length": len(line), "split": split}
+            appended += 1
     except Exception as e:
         print(f"[WARN] Could not load {path.name}: {e}")
-    return []
+    return ids, appended
 
-def fetch_arc_datasets():
-    """Load training and test datasets, then merge for unified use."""
-    train = _load_json(TRAIN_PATH)
-    test = _load_json(TEST_PATH)
+def compact_merged():
+    """Rewrite the merged store without superseded task versions."""
+    index = _load_index()
+    if not index:
+        return
+    tmp = MERGED_JSONL.with_name(MERGED_JSONL.name + ".tmp")
+    with open(MERGED_JSONL, "rb") as src, open(tmp, "wb") as dst:
+        for entry in index.values():
+            src.seek(entry["offset"])
+            line = src.read(entry["length"])
+            entry["offset"] = dst.tell()
+            dst.write(line)
+    os.replace(tmp, MERGED_JSONL)
+    _save_index(index)
 
-    # Filter malformed or empty tasks
-    train = [t for t in train if isinstance(t, dict) and "train" in t]
-    test  = [t for t in test if isinstance(t, dict) and "test" in t]
+def fetch_arc_datasets():
+    """Stream training and test datasets into the merged store; returns their task ids."""
+    index = _load_index()
+    if not index and MERGED_JSONL.exists():
+        MERGED_JSONL.unlink()   # store without a usable index: rebuild it
+    with open(MERGED_JSONL, "ab") as out:
+        out.seek(0, os.SEEK_END)
+        train, added_tr = _ingest(TRAIN_PATH, "train", "train", index, out)
+        test, added_te = _ingest(TEST_PATH, "test", "test", index, out)
 
     print(f"[INFO] Loaded {len(train)} training tasks, {len(test)} testing tasks.")
 
-    # Merge both for continuity learning
-    merged = train + test
-    if merged:
-        with open(MERGED_PATH, "w") as f:
-            json.dump(merged, f, indent=2)
-        print(f"[DATA] Merged {len(merged)} total tasks → {MERGED_PATH}")
+    added = added_tr + added_te
+    if added:
+        _save_index(index)
+        live = sum(e["length"] for e in index.values())
+        if MERGED_JSONL.stat().st_size > 2 * live:
+            compact_merged()
+        print(f"[DATA] Merged {added} new/changed tasks ({len(index)} total) → {MERGED_JSONL}")
+    elif index:
+        print(f"[DATA] Merged store up to date ({len(index)} tasks).")
     else:
         print("[DATA] No tasks to merge.")
 
+    if USE_PACK:
+        ensure_pack()
     return train, test
 
+# ---------------- reading ----------------
+class TaskStream:
+    """Re-iterable view of the merged store; each pass loads one task at a time."""
+
+    def __init__(self, path: Path = None, index: Dict[str, Dict[str, Any]] = None):
+        self.path = Path(path or MERGED_JSONL)
+        index = _load_index() if index is None else index
+        self._spans = [(e["offset"], e["length"]) for e in index.values()]
+        self._ids = list(index)
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, "rb") as f:
+            for offset, length in self._spans:
+                f.seek(offset)
+                yield json.loads(f.read(length))
+
+def _source_stamp() -> Optional[str]:
+    """Identity of the current merged data (index hashes, or legacy file size+mtime)."""
+    index = _load_index()
+    if index:
+        raw = json.dumps([[k, e["hash"]] for k, e in index.items()], separators=(",", ":"))
+        return "index:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    if MERGED_PATH.exists():
+        st = MERGED_PATH.stat()
+        return f"legacy:{st.st_size}:{st.st_mtime_ns}"
+    return None
+
+def _source_tasks():
+    """Tasks from the merged store (falls back to loading a legacy merged_dataset.json)."""
+    index = _load_index()
+    if index:
+        return TaskStream(index=index)
+    if MERGED_PATH.exists():
+        with open(MERGED_PATH) as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else [data]
+    return []
+
+def ensure_pack(force: bool = False) -> Optional[TaskPack]:
+    """Open the task pack, (re)building it first if the merged data changed."""
+    stamp = _source_stamp()
+    if stamp is None:
+        return None
+    if not force and pack_source(PACK_PATH) == stamp:
+        return open_pack(PACK_PATH)
+    try:
+        n = build_pack(_source_tasks(), PACK_PATH, source=stamp)
+    except Exception as e:
+        print(f"[WARN] Could not build {PACK_PATH.name}: {e}")
+        return None
+    print(f"[DATA] Packed {n} tasks → {PACK_PATH}")
+    return open_pack(PACK_PATH)
+
+def stream_tasks():
+    """Re-iterable tasks: the mmap-ed pack if available, else the merged store."""
+    pack = ensure_pack() if USE_PACK else None
+    return pack if pack is not None else _source_tasks()
+
 if __name__ == "__main__":
     tr, te = fetch_arc_datasets()
     print("Training tasks:", len(tr))
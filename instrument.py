@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# instrument.py — per-stage timing of the solver (opt-in: ARC_INSTRUMENT=1)
+#
+#   @timed("learn")                  time every call of a function
+#   with stage("score"): ...         time a block
+#   with task_scope(task_id): ...    attribute the stages inside to a task
+#   set_cycle(n)                     attribute subsequent stages to cycle n
+#
+# Each stage keeps call count, wall time (perf_counter), CPU time
+# (process_time) and a latency histogram with 8 log-spaced bins per decade
+# (1 µs .. 100 s) from which p50/p95/p99 are read — in total, per cycle and
+# per task.  Histograms are sparse {bin: count} dicts, so merging is a sum.
+#
+# Disabled (the default), @timed returns the function itself and stage() /
+# task_scope() return one shared no-op context, so instrumented code costs
+# nothing.  The switch is read once, at import: @timed decides then whether
+# to wrap, so ARC_INSTRUMENT must be set before the solver is imported.
+#
+# With ARC_TRACE set (tracer.py) stages and task scopes are also active and
+# emit begin/end trace spans, whether or not ARC_INSTRUMENT is on.
+#
+# Pool workers inherit (fork) or start with an empty recorder; _solve_worker
+# drains it after each task and the parent merges the snapshot into the
+# current cycle.  summary() formats the table printed at the end of main.
+
+import os
+import math
+import time
+import json
+import functools
+from bisect import bisect_right
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from arc_solver import tracer
+
+ENABLED = os.environ.get("ARC_INSTRUMENT", "0") not in ("", "0")
+OUT_PATH = os.environ.get("ARC_INSTRUMENT_OUT")   # optional JSON dump of the raw stats
+BINS_PER_DECADE = 8
+_EDGES = [10 ** (e / BINS_PER_DECADE) for e in range(-6 * BINS_PER_DECADE, 2 * BINS_PER_DECADE + 1)]
+_NULL = nullcontext()
+
+def _active() -> bool:
+    return ENABLED or tracer.ENABLED
+
+def _new() -> Dict[str, Any]:
+    return {"calls": 0, "wall": 0.0, "cpu": 0.0, "hist": {}}
+
+def _add(rec: Dict[str, Any], wall: float, cpu: float, b: int):
+    rec["calls"] += 1
+    rec["wall"] += wall
+    rec["cpu"] += cpu
+    rec["hist"][b] = rec["hist"].get(b, 0) + 1
+
+def _merge(into: Dict[str, Any], rec: Dict[str, Any]):
+    into["calls"] += rec["calls"]
+    into["wall"] += rec["wall"]
+    into["cpu"] += rec["cpu"]
+    for b, n in rec["hist"].items():
+        into["hist"][int(b)] = into["hist"].get(int(b), 0) + n
+
+def percentile(rec: Dict[str, Any], q: float) -> float:
+    """Latency (seconds) at percentile q (0..100): geometric midpoint of the bin it falls in."""
+    if not rec["calls"]:
+        return 0.0
+    target = math.ceil(q / 100.0 * rec["calls"])
+    seen = 0
+    for b in sorted(rec["hist"]):
+        seen += rec["hist"][b]
+        if seen >= max(1, target):
+            lo = _EDGES[b - 1] if b > 0 else 0.0
+            hi = _EDGES[b] if b < len(_EDGES) else _EDGES[-1]
+            return math.sqrt(lo * hi) if lo else hi
+    return _EDGES[-1]
+
+class Recorder:
+    """Per-process stage statistics: totals, per cycle and per task."""
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self.cycle: Optional[int] = None
+        self.task: Optional[str] = None
+        self.totals: Dict[str, Dict[str, Any]] = {}
+        self.cycles: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self.tasks: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._reset()   # a forked worker reports only its own stages
+
+    def record(self, name: str, wall: float, cpu: float):
+        self._check_fork()
+        b = bisect_right(_EDGES, wall)
+        _add(self.totals.setdefault(name, _new()), wall, cpu, b)
+        if self.cycle is not None:
+            _add(self.cycles.setdefault(self.cycle, {}).setdefault(name, _new()), wall, cpu, b)
+        if self.task is not None:
+            _add(self.tasks.setdefault(self.task, {}).setdefault(name, _new()), wall, cpu, b)
+
+    def drain(self) -> Dict[str, Any]:
+        """Stages recorded since the last drain (picklable); the recorder is emptied."""
+        self._check_fork()
+        snap = {"stages": self.totals, "tasks": self.tasks}
+        self.totals, self.cycles, self.tasks = {}, {}, {}
+        return snap
+
+    def merge(self, snap: Optional[Dict[str, Any]]):
+        """Add a worker's drained snapshot to the totals and the current cycle."""
+        if not snap:
+            return
+        for name, rec in snap["stages"].items():
+            _merge(self.totals.setdefault(name, _new()), rec)
+            if self.cycle is not None:
+                _merge(self.cycles.setdefault(self.cycle, {}).setdefault(name, _new()), rec)
+        for tid, stages in snap["tasks"].items():
+            for name, rec in stages.items():
+                _merge(self.tasks.setdefault(tid, {}).setdefault(name, _new()), rec)
+
+    # ---------------- report ----------------
+    @staticmethod
+    def _rows(stages: Dict[str, Dict[str, Any]]) -> List[str]:
+        rows = []
+        for name, rec in sorted(stages.items(), key=lambda kv: kv[1]["wall"], reverse=True):
+            rows.append(f"  {name:24s} {rec['calls']:7d} {rec['wall']:9.3f} {rec['cpu']:9.3f} "
+                        + " ".join(f"{percentile(rec, q) * 1e3:9.3f}" for q in (50, 95, 99)))
+        return rows
+
+    def summary(self, top_tasks: int = 5) -> str:
+        head = f"  {'stage':24s} {'calls':>7s} {'wall_s':>9s} {'cpu_s':>9s} {'p50_ms':>9s} {'p95_ms':>9s} {'p99_ms':>9s}"
+        lines = ["[INSTR] Stage timings (all cycles)", head] + self._rows(self.totals)
+        for cyc in sorted(self.cycles):
+            lines += [f"[INSTR] Cycle {cyc}"] + self._rows(self.cycles[cyc])
+        slow = sorted(self.tasks.items(), key=lambda kv: sum(r["wall"] for r in kv[1].values()), reverse=True)
+        for tid, stages in slow[:top_tasks]:
+            parts = ", ".join(f"{n}={r['wall'] * 1e3:.1f}ms" for n, r in
+                              sorted(stages.items(), key=lambda kv: kv[1]["wall"], reverse=True)[:4])
+            lines.append(f"[INSTR] Slow task {tid}: {parts}")
+        return "\n".join(lines)
+
+    def dump(self, path: Path):
+        with open(path, "w") as f:
+            json.dump({"totals": self.totals, "cycles": self.cycles, "tasks": self.tasks}, f)
+
+INSTR = Recorder()
+
+class _Stage:
+    __slots__ = ("name", "t0", "c0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        if tracer.ENABLED:
+            tracer.begin(self.name)
+        self.t0, self.c0 = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        if ENABLED:
+            INSTR.record(self.name, time.perf_counter() - self.t0, time.process_time() - self.c0)
+        if tracer.ENABLED:
+            tracer.end(self.name)
+        return False
+
+class _TaskScope:
+    __slots__ = ("tid", "prev")
+
+    def __init__(self, tid: str):
+        self.tid = tid
+
+    def __enter__(self):
+        INSTR._check_fork()
+        self.prev, INSTR.task = INSTR.task, self.tid
+        if tracer.ENABLED:
+            tracer.begin(f"task {self.tid}", "task")
+        return self
+
+    def __exit__(self, *exc):
+        if tracer.ENABLED:
+            tracer.end(f"task {self.tid}", "task")
+        INSTR.task = self.prev
+        return False
+
+def stage(name: str):
+    """Context manager timing a block as stage `name` (no-op when disabled)."""
+    return _Stage(name) if _active() else _NULL
+
+def task_scope(tid: str):
+    """Context manager attributing the stages inside to task `tid` (no-op when disabled)."""
+    return _TaskScope(tid) if _active() else _NULL
+
+def timed(name: str = None) -> Callable[[Callable], Callable]:
+    """Decorator timing every call as stage `name` (default: the function name)."""
+    def deco(fn: Callable) -> Callable:
+        if not _active():
+            return fn
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Stage(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def set_cycle(n: Optional[int]):
+    INSTR._check_fork()
+    INSTR.cycle = n
+
+def drain() -> Optional[Dict[str, Any]]:
+    """Worker side: snapshot to return to the parent (None when disabled)."""
+    return INSTR.drain() if ENABLED else None
+
+def merge(snap: Optional[Dict[str, Any]]):
+    INSTR.merge(snap)
+
+def report():
+    """Print the summary table (and dump ARC_INSTRUMENT_OUT) if enabled."""
+    if not ENABLED:
+        return
+    print(INSTR.summary())
+    if OUT_PATH:
+        INSTR.dump(Path(OUT_PATH))
+        print(f"[INSTR] Raw stats written → {OUT_PATH}")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# ledger_aggregates.py — running per-rule-type aggregates over segmented ledgers
+#
+# Every ledger gets a sidecar state file (<ledger>.agg.json) holding, per rule
+# type, count / sum / sum of squares of the confidences and the last event
+# time, plus the position up to which the ledger has been folded in: the
+# segment number (see ledger_segments; the hot file is the segment after the
+# last sealed one), the byte offset and the number of events read in it.  A
+# query only reads what was appended since, so its cost no longer grows with
+# the ledger's history.  A segment sealed mid-way is resumed at the byte
+# offset, or at the event count once it has been compacted to .npz.
+#
+# The sidecar also records the hot file's first line: if it shrinks or its
+# first line changes (truncated / replaced), the aggregates are rebuilt.
+# strict=True skips events without rule_type/confidence instead of counting
+# them as "unknown" / 0.0; each mode keeps its own aggregates.
+# since/until restrict a query to a time range; such queries scan the
+# segments (skipping compacted ones outside the range) and are not persisted.
+
+import math
+from hashlib import sha1
+from pathlib import Path
+from typing import Any, Dict, Optional
+import numpy as np
+from arc_solver.state_store import load_state, save_state
+from arc_solver.ledger_writer import flush_ledger
+from arc_solver.ledger_segments import (Columns, NO_TIME, from_micros, read_lines, read_segment,
+                                        scan, sealed_segments)
+
+HEAD_BYTES = 256   # bytes of the first line fingerprinted to detect replaced ledgers
+
+def _sidecar(path: Path, strict: bool) -> Path:
+    return path.with_name(path.name + (".agg_strict.json" if strict else ".agg.json"))
+
+def _head(path: Path) -> str:
+    with open(path, "rb") as f:
+        first = f.read(HEAD_BYTES).split(b"\n", 1)[0]
+    return sha1(first).hexdigest()[:16]
+
+def _empty() -> Dict[str, Any]:
+    return {"seg": 1, "offset": 0, "rows": 0, "head": "", "types": {}}
+
+def _fold(types: Dict[str, Dict[str, Any]], cols: Columns, strict: bool):
+    """Add one segment's (or a tail's) events to `types`, in order of first appearance."""
+    if not len(cols):
+        return
+    unknown = len(cols.names)
+    tid, conf, time = cols.type_id, cols.conf, cols.time
+    if strict:
+        keep = (tid >= 0) & ~np.isnan(conf)
+        tid, conf, time = tid[keep], conf[keep], time[keep]
+        if not len(tid):
+            return
+    else:
+        tid = np.where(tid >= 0, tid, unknown)
+        conf = np.nan_to_num(conf, nan=0.0)
+    names = cols.names + ["unknown"]
+    count = np.bincount(tid, minlength=unknown + 1)
+    total = np.bincount(tid, weights=conf, minlength=unknown + 1)
+    sumsq = np.bincount(tid, weights=conf * conf, minlength=unknown + 1)
+    last = np.full(unknown + 1, -1, dtype=np.int64)
+    timed = np.flatnonzero(time != NO_TIME)
+    np.maximum.at(last, tid[timed], timed)
+    seen, first = np.unique(tid, return_index=True)
+    for t in seen[np.argsort(first)]:
+        rec = types.setdefault(names[t], {"count": 0, "sum": 0.0, "sumsq": 0.0, "last_seen": None})
+        rec["count"] += int(count[t])
+        rec["sum"] += float(total[t])
+        rec["sumsq"] += float(sumsq[t])
+        if last[t] >= 0:
+            rec["last_seen"] = from_micros(time[last[t]])
+
+def _catch_up(path: Path, agg: Dict[str, Any], strict: bool) -> Optional[bool]:
+    """Fold everything past agg's position; True if it moved, None if the hot file was replaced."""
+    moved = False
+    sealed = sealed_segments(path)
+    hot_seq = (sealed[-1][0] if sealed else 0) + 1
+    if agg["seg"] > hot_seq:
+        return None                                  # segments were removed
+    for seq, seg in sealed:
+        if seq < agg["seg"]:
+            continue
+        resume = seq == agg["seg"]
+        if seg.suffix == ".npz":
+            cols = read_segment(seg)
+            if resume:
+                cols = cols.select(slice(agg["rows"], None))
+        else:
+            with open(seg, "rb") as f:
+                rows, _ = read_lines(f, agg["offset"] if resume else 0)
+            cols = Columns.from_rows(rows)
+        _fold(agg["types"], cols, strict)
+        agg.update(seg=seq + 1, offset=0, rows=0, head="")
+        moved = True
+    try:
+        size = path.stat().st_size
+        if size < agg["offset"] or (agg["offset"] and _head(path) != agg["head"]):
+            return None                              # ledger truncated or replaced
+        if size > agg["offset"]:
+            with open(path, "rb") as f:
+                rows, used = read_lines(f, agg["offset"], size)   # a partial line waits
+            if used:
+                _fold(agg["types"], Columns.from_rows(rows), strict)
+                if not agg["offset"]:
+                    agg["head"] = _head(path)
+                agg["offset"] += used
+                agg["rows"] += len(rows)
+                moved = True
+    except FileNotFoundError:
+        pass                                         # no hot segment yet (or just rotated)
+    return moved
+
+def ledger_aggregates(path: Path, strict: bool = False, since=None,
+                      until=None) -> Dict[str, Dict[str, Any]]:
+    """
+    {rule_type: {count, sum, sumsq, last_seen}} over every event in the
+    ledger's segments, in order of first appearance.  Without a time range the
+    returned dict is the live running aggregate: do not modify it.
+    since/until (ISO string, datetime or epoch seconds) keep since <= time < until.
+    """
+    path = Path(path)
+    flush_ledger(path)
+    if since is not None or until is not None:
+        types: Dict[str, Dict[str, Any]] = {}
+        for cols in scan(path, since, until):
+            _fold(types, cols, strict)
+        return types
+    side = _sidecar(path, strict)
+    agg = load_state(side, None)
+    if not isinstance(agg, dict) or "seg" not in agg:
+        agg = _empty()
+    moved = _catch_up(path, agg, strict)
+    if moved is None:
+        agg = _empty()
+        _catch_up(path, agg, strict)
+    if moved is not False:
+        save_state(side, agg)
+    return agg["types"]
+
+def mean(rec: Dict[str, Any]) -> float:
+    return rec["sum"] / rec["count"] if rec["count"] else 0.0
+
+def std(rec: Dict[str, Any]) -> float:
+    """Population standard deviation."""
+    if not rec["count"]:
+        return 0.0
+    m = mean(rec)
+    return math.sqrt(max(0.0, rec["sumsq"] / rec["count"] - m * m))
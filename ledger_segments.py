@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# ledger_segments.py — log-structured storage for append-only ledgers
+#
+# A ledger path (e.g. observer_log.jsonl) is its hot segment: events are
+# appended to it.  Once it reaches ARC_LEDGER_SEGMENT_MB it is sealed by
+# renaming it into the ledger's segment directory:
+#
+#   observer_log.jsonl                  hot segment (appended to)
+#   observer_log.jsonl.d/seg-000001.jsonl   sealed, not yet compacted
+#   observer_log.jsonl.d/seg-000002.npz     sealed and compacted
+#
+# compact() folds sealed JSONL segments into columnar .npz files holding only
+# what the readers use: event time (int64 µs since the epoch), rule-type id
+# (int32, into a per-segment name table) and confidence (float64), plus the
+# segment's time range so time-range queries can skip it unopened.  Lines
+# that are not JSON objects are dropped; a missing rule type is id -1 and a
+# missing/invalid confidence is NaN.
+#
+# Only the main process rotates and compacts; pool workers only append.
+# Plain-text logs (mutation_amp.log) use rotate() alone.
+
+import os
+import re
+import json
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+SEGMENT_BYTES = int(float(os.environ.get("ARC_LEDGER_SEGMENT_MB", "8")) * 1024 * 1024)
+NO_TIME = np.iinfo(np.int64).min
+_SEG_RE = re.compile(r"^seg-(\d{6})\.(\w+)$")
+JSON_SUFFIXES = (".jsonl", ".json")   # segments compact() understands
+_ROTATED = set()   # ledgers sealed by this process, compacted by compact_ledgers()
+
+def segment_dir(path: Path) -> Path:
+    return path.with_name(path.name + ".d")
+
+def sealed_segments(path: Path) -> List[Tuple[int, Path]]:
+    """(sequence number, file) of the sealed segments, oldest first (.npz preferred)."""
+    d = segment_dir(Path(path))
+    if not d.is_dir():
+        return []
+    found: Dict[int, Path] = {}
+    for f in d.iterdir():
+        m = _SEG_RE.match(f.name)
+        if m and (int(m.group(1)) not in found or f.suffix == ".npz"):
+            found[int(m.group(1))] = f
+    return sorted(found.items())
+
+def _main_process() -> bool:
+    return multiprocessing.parent_process() is None
+
+def rotate(path: Path, min_bytes: int = SEGMENT_BYTES) -> Optional[Path]:
+    """Seal the hot segment if it holds at least `min_bytes`; returns the sealed file."""
+    path = Path(path)
+    try:
+        if not _main_process() or not path.exists() or path.stat().st_size < max(1, min_bytes):
+            return None
+        sealed = sealed_segments(path)
+        seq = (sealed[-1][0] if sealed else 0) + 1
+        seg = segment_dir(path) / f"seg-{seq:06d}{path.suffix}"
+        seg.parent.mkdir(exist_ok=True)
+        os.replace(path, seg)
+        if path.suffix in JSON_SUFFIXES:
+            _ROTATED.add(path)
+        return seg
+    except OSError as e:
+        print(f"[LEDGER] Rotate error ({path.name}): {e}")
+        return None
+
+# ---------------- rows ----------------
+def to_micros(t: Any) -> int:
+    """ISO time string (naive = UTC), datetime or epoch seconds → µs since the epoch."""
+    if isinstance(t, (int, float)):
+        return int(round(t * 1e6))
+    if isinstance(t, str):
+        t = datetime.fromisoformat(t)
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    delta = t - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def from_micros(us: int) -> str:
+    """µs since the epoch → naive UTC ISO string (the ledgers' own time format)."""
+    return (datetime(1970, 1, 1) + timedelta(microseconds=int(us))).isoformat()
+
+def parse_row(line: bytes) -> Optional[Tuple[Optional[str], float, int]]:
+    """(rule type or None, confidence or NaN, time µs or NO_TIME) of one ledger line."""
+    try:
+        ev = json.loads(line)
+    except Exception:
+        return None
+    if not isinstance(ev, dict):
+        return None
+    rtype = ev.get("rule_type")
+    try:
+        conf = float(ev["confidence"])
+    except Exception:
+        conf = float("nan")
+    try:
+        t = to_micros(ev["time"])
+    except Exception:
+        t = NO_TIME
+    return (None if rtype is None else str(rtype)), conf, t
+
+class Columns:
+    """Columnar rows of one segment: names[type_id], conf, time (µs)."""
+    __slots__ = ("names", "type_id", "conf", "time")
+
+    def __init__(self, names: List[str], type_id: np.ndarray, conf: np.ndarray, time: np.ndarray):
+        self.names, self.type_id, self.conf, self.time = names, type_id, conf, time
+
+    def __len__(self) -> int:
+        return len(self.type_id)
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple[Optional[str], float, int]]) -> "Columns":
+        ids: Dict[str, int] = {}
+        type_id = np.array([-1 if r is None else ids.setdefault(r, len(ids)) for r, _, _ in rows], dtype=np.int32)
+        conf = np.array([c for _, c, _ in rows], dtype=np.float64)
+        time = np.array([t for _, _, t in rows], dtype=np.int64)
+        return cls(list(ids), type_id, conf, time)
+
+    def select(self, mask: np.ndarray) -> "Columns":
+        return Columns(self.names, self.type_id[mask], self.conf[mask], self.time[mask])
+
+def read_lines(f, start: int = 0, end: int = None) -> Tuple[List[Tuple], int]:
+    """Parsed rows of the complete lines in [start, end) of an open file; returns (rows, bytes used)."""
+    f.seek(start)
+    data = f.read() if end is None else f.read(max(0, end - start))
+    used = data.rfind(b"\n") + 1
+    rows = []
+    for line in data[:used].splitlines():
+        if line.strip():
+            row = parse_row(line)
+            if row is not None:
+                rows.append(row)
+    return rows, used
+
+def read_segment(seg: Path) -> Columns:
+    if seg.suffix == ".npz":
+        with np.load(seg) as z:
+            return Columns([str(n) for n in z["names"]], z["type_id"], z["conf"], z["time"])
+    with open(seg, "rb") as f:
+        rows, _ = read_lines(f)
+    return Columns.from_rows(rows)
+
+def _time_range(seg: Path) -> Tuple[int, int]:
+    with np.load(seg) as z:
+        return int(z["t_min"]), int(z["t_max"])
+
+# ---------------- compaction ----------------
+def compact(path: Path) -> int:
+    """Fold the ledger's sealed JSONL segments into .npz files; returns segments compacted."""
+    if not _main_process():
+        return 0
+    done = 0
+    for seq, seg in sealed_segments(path):
+        if seg.suffix not in JSON_SUFFIXES:
+            continue
+        cols = read_segment(seg)
+        timed = cols.time[cols.time != NO_TIME]
+        out = seg.with_name(f"seg-{seq:06d}.npz")
+        tmp = seg.with_name(f"seg-{seq:06d}.tmp.npz")
+        np.savez(tmp, names=np.array(cols.names, dtype=str), type_id=cols.type_id, conf=cols.conf,
+                 time=cols.time, t_min=timed.min() if len(timed) else NO_TIME,
+                 t_max=timed.max() if len(timed) else NO_TIME)
+        os.replace(tmp, out)
+        seg.unlink()
+        done += 1
+    return done
+
+def compact_ledgers() -> int:
+    """Compact every JSON ledger this process has rotated; returns segments compacted."""
+    done = 0
+    for path in sorted(_ROTATED):
+        try:
+            done += compact(path)
+        except Exception as e:
+            print(f"[LEDGER] Compact error ({path.name}): {e}")
+    _ROTATED.clear()
+    return done
+
+# ---------------- queries ----------------
+def scan(path: Path, since=None, until=None) -> Iterator[Columns]:
+    """
+    Columns of every segment, oldest first (sealed, then the hot one),
+    restricted to events with since <= time < until when either is given.
+    """
+    path = Path(path)
+    lo = None if since is None else to_micros(since)
+    hi = None if until is None else to_micros(until)
+    files = [seg for _, seg in sealed_segments(path)] + ([path] if path.exists() else [])
+    for seg in files:
+        if (lo is not None or hi is not None) and seg.suffix == ".npz":
+            t_min, t_max = _time_range(seg)
+            if t_min == NO_TIME or (lo is not None and t_max < lo) or (hi is not None and t_min >= hi):
+                continue
+        cols = read_segment(seg)
+        if lo is not None or hi is not None:
+            keep = cols.time != NO_TIME
+            if lo is not None:
+                keep &= cols.time >= lo
+            if hi is not None:
+                keep &= cols.time < hi
+            cols = cols.select(keep)
+        yield cols
+
+if __name__ == "__main__":
+    import sys
+    for p in sys.argv[1:]:
+        print(f"[LEDGER] Compacted {compact(Path(p))} segments of {p}")
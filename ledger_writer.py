@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# ledger_writer.py — buffered background writer for append-only JSONL ledgers
+#
+# append_event(path, event) serializes the event and queues the line in
+# memory; a daemon thread appends queued lines in batches (one open/write per
+# ledger file) once ARC_LEDGER_BATCH lines are pending or every
+# ARC_LEDGER_INTERVAL seconds.  Producers only block when ARC_LEDGER_MAX_QUEUE
+# lines are waiting (backpressure, counted in ledger_stats()).
+#
+# Readers call flush_ledger(path) before reading so they see every event
+# appended so far.  Pending lines are flushed at interpreter exit and, in
+# multiprocessing children, at process exit.  A forked child starts with an
+# empty queue (the parent still owns the lines it had queued).
+# ARC_LEDGER_ASYNC=0 writes every event synchronously.  After each write the
+# ledger's hot segment is rotated once it reaches ARC_LEDGER_SEGMENT_MB
+# (ledger_segments; main process only).
+
+import os
+import json
+import time
+import atexit
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+from arc_solver.ledger_segments import rotate
+
+BATCH_SIZE = int(os.environ.get("ARC_LEDGER_BATCH", "256"))
+INTERVAL = float(os.environ.get("ARC_LEDGER_INTERVAL", "0.5"))
+MAX_QUEUE = int(os.environ.get("ARC_LEDGER_MAX_QUEUE", "65536"))
+ASYNC = os.environ.get("ARC_LEDGER_ASYNC", "1") != "0"
+
+class LedgerWriter:
+    """Per-process queue of ledger lines drained by a background thread."""
+
+    def __init__(self, batch_size: int = BATCH_SIZE, interval: float = INTERVAL,
+                 max_queue: int = MAX_QUEUE, background: bool = ASYNC):
+        self.batch_size = max(1, int(batch_size))
+        self.interval = float(interval)
+        self.max_queue = max(self.batch_size, int(max_queue))
+        self.background = background
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)     # writer: work to do
+        self._drained = threading.Condition(self._lock)  # producers: queue shrank
+        self._io = threading.Lock()                      # one batch on disk at a time
+        self._queue: Dict[Path, List[str]] = {}
+        self._pending = 0
+        self._thread = None
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "errors": 0, "rotated": 0,
+                      "blocked": 0, "blocked_s": 0.0, "max_depth": 0}
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._reset()
+            try:
+                from multiprocessing import util
+                util.Finalize(self, self.flush, exitpriority=10)   # children skip atexit
+            except Exception:
+                pass
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+            self._thread.start()
+
+    # ---------------- producers ----------------
+    def append(self, path: Path, event: Dict[str, Any]):
+        """Queue one JSON event for `path` (serialized now, written later)."""
+        line = json.dumps(event) + "\n"
+        self._check_fork()
+        if not self.background:
+            with self._io:
+                self._write({Path(path): [line]})
+            return
+        self._start()
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self.stats["blocked"] += 1
+                t0 = time.perf_counter()
+                self._wake.notify()
+                while self._pending >= self.max_queue:
+                    self._drained.wait(self.interval or None)
+                self.stats["blocked_s"] += time.perf_counter() - t0
+            self._queue.setdefault(Path(path), []).append(line)
+            self._pending += 1
+            self.stats["enqueued"] += 1
+            self.stats["max_depth"] = max(self.stats["max_depth"], self._pending)
+            if self._pending >= self.batch_size:
+                self._wake.notify()
+
+    # ---------------- draining ----------------
+    def _take(self, path: Path = None) -> Dict[Path, List[str]]:
+        """Remove and return queued lines (all ledgers, or only `path`); caller holds _lock."""
+        if path is None:
+            batch, self._queue = self._queue, {}
+        else:
+            lines = self._queue.pop(Path(path), None)
+            batch = {Path(path): lines} if lines else {}
+        self._pending -= sum(len(lines) for lines in batch.values())
+        self._drained.notify_all()
+        return batch
+
+    def _write(self, batch: Dict[Path, List[str]]):
+        for path, lines in batch.items():
+            try:
+                with open(path, "a") as f:
+                    f.write("".join(lines))
+                self.stats["written"] += len(lines)
+                if rotate(path):
+                    self.stats["rotated"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[LEDGER] Write error ({path.name}): {e}")
+        if batch:
+            self.stats["batches"] += 1
+
+    def flush(self, path: Path = None) -> int:
+        """Write queued lines now (all ledgers, or only `path`); returns lines written."""
+        self._check_fork()
+        with self._io:
+            with self._lock:
+                batch = self._take(path)
+            self._write(batch)
+        return sum(len(lines) for lines in batch.values())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._pending < self.batch_size:
+                    self._wake.wait(self.interval or None)
+                if not self._pending:
+                    continue
+            with self._io:
+                with self._lock:
+                    batch = self._take()
+                self._write(batch)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters plus current queue depth (backpressure: blocked / blocked_s)."""
+        with self._lock:
+            return {**self.stats, "depth": self._pending}
+
+WRITER = LedgerWriter()
+atexit.register(WRITER.flush)
+
+def append_event(path: Path, event: Dict[str, Any]):
+    """Append one event to a JSONL ledger (buffered)."""
+    WRITER.append(path, event)
+
+def flush_ledger(path: Path = None) -> int:
+    """Write pending events of `path` (or all ledgers) to disk."""
+    return WRITER.flush(path)
+
+def ledger_stats() -> Dict[str, Any]:
+    return WRITER.metrics()
@@ -8,39 +8,127 @@ import os
 import json
 import numpy as np
 from pathlib import Path
-from arc_solver.step4_solve import solve_task
+from collections import Counter, deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from arc_solver.fetch_arc_datasets import stream_tasks
+from arc_solver.step4_solve import solve_task, new_updates, apply_updates
 from arc_solver.step10_meta_mutate import meta_mutate
 from arc_solver.step14_mutation_amplifier import amplify_mutations
 from arc_solver.step15_meta_decay import decay_meta_weights
 from arc_solver.step7_autolearn import summarize_ledger, update_meta_weights
+from arc_solver.state_store import STORE, flush_state
+from arc_solver.step23_meta_ensemble import PRUNE_STATS, get_prune_stats
+from arc_solver.ledger_writer import ledger_stats, flush_ledger
+from arc_solver.ledger_segments import compact_ledgers
+from arc_solver.instrument import timed, task_scope, set_cycle, drain, merge, report
+from arc_solver import tracer
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 SUBMISSION_PATH = WORK / "submission.json"
 CONF_THRESH = 0.85
 MAX_CYCLES = 5
+WORKERS = int(os.environ.get("ARC_WORKERS", "1"))  # >1 enables parallel cycles
+MAX_CHUNK = 8   # tasks per pool submission; at most 2 submissions per worker in flight
+INCREMENTAL = os.environ.get("ARC_INCREMENTAL", "1") != "0"  # reuse results of unchanged tasks
 
 def load_tasks():
-    merged = WORK / "merged_dataset.json"
-    with open(merged) as f:
-        return json.load(f)
+    """Re-iterable task stream (see fetch_arc_datasets.stream_tasks)."""
+    return stream_tasks()
 
-def run_cycle(tasks):
+def _init_worker():
+    """Pool workers keep state in memory only; the parent persists merged updates."""
+    STORE.read_only = True
+
+def _solve_worker(task, record=None):
+    """Solve one task in a pool worker; state writes are returned, not persisted."""
+    updates = new_updates()
+    before = get_prune_stats()
+    with task_scope(task.get("id", "unknown")):
+        preds, conf = solve_task(task, updates=updates, record=record)
+    updates["prune"] = {k: v - before[k] for k, v in get_prune_stats().items()}
+    updates["instrument"] = drain()
+    updates["trace"] = tracer.drain()
+    return task.get("id", "unknown"), preds, conf, updates, record
+
+def _solve_chunk(batch):
+    return [_solve_worker(task, record) for task, record in batch]
+
+def _pool_results(pool, tasks, chunk: int, window: int):
+    """Ordered worker results, with only `window` chunks of tasks in flight at once."""
+    it = iter(tasks)
+    pending = deque()
+
+    def submit() -> bool:
+        batch = list(islice(it, chunk))
+        if batch:
+            pending.append(pool.submit(_solve_chunk, batch))
+        return bool(batch)
+
+    for _ in range(window):
+        if not submit():
+            break
+    while pending:
+        yield from pending.popleft().result()
+        submit()
+
+@timed("run_cycle")
+def run_cycle(tasks, workers: int = WORKERS, incr: dict = None):
+    """
+    Solve every task once.  `incr` (task id → record, kept across cycles)
+    makes the cycle incremental: see solve_task(record=...).
+    """
     results = {}
     confs = []
-    for task in tasks:
-        preds, conf = solve_task(task)
-        results[task.get("id", "unknown")] = preds
-        confs.append(conf)
+    status = Counter()
+    if workers <= 1:
+        for task in tasks:
+            tid = task.get("id", "unknown")
+            record = incr.setdefault(tid, {}) if incr is not None else None
+            with task_scope(tid):
+                preds, conf = solve_task(task, record=record)
+            results[tid] = preds
+            confs.append(conf)
+            if record is not None:
+                status[record["status"]] += 1
+        _report_incr(status, incr)
+        return results, float(np.mean(confs))
+
+    # Parallel: fan tasks out, then merge results and state updates in task order
+    # so the persisted state (and submission) matches a serial run.
+    flush_state()  # workers load state from disk
+    n = len(tasks) if hasattr(tasks, "__len__") else 0
+    chunk = max(1, min(MAX_CHUNK, n // (workers * 4)))
+    jobs = ((t, incr.get(t.get("id", "unknown"), {}) if incr is not None else None) for t in tasks)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for tid, preds, conf, updates, record in _pool_results(pool, jobs, chunk, workers * 2):
+            results[tid] = preds
+            confs.append(conf)
+            apply_updates(updates)
+            merge(updates.get("instrument"))
+            tracer.merge(updates.get("trace"))
+            for k, v in updates.get("prune", {}).items():
+                PRUNE_STATS[k] += v
+            if record is not None:
+                incr[tid] = record
+                status[record["status"]] += 1
+    _report_incr(status, incr)
     return results, float(np.mean(confs))
 
+def _report_incr(status: Counter, incr: dict):
+    if incr is not None:
+        print(f"[INCR] recomputed={status['recomputed']} reused={status['reused']} frozen={status['frozen']}")
+
 def main():
-    print("[INIT] Loading dataset...")
+    print(f"[INIT] Loading dataset... (workers={WORKERS})")
     tasks = load_tasks()
     last_conf = 0.0
+    incr = {} if INCREMENTAL else None
 
     for cycle in range(1, MAX_CYCLES + 1):
         print(f"[CYCLE {cycle}] Running solver...")
-        results, avg_conf = run_cycle(tasks)
+        set_cycle(cycle)
+        results, avg_conf = run_cycle(tasks, incr=incr)
         results, _fix_issues = validate_and_fix(results, tasks)
         print(f"[SUBMIT-CHECK] {len(_fix_issues)} post-fix issues detected" if _fix_issues else "[SUBMIT-CHECK] OK")
         print(f"[CYCLE {cycle}] Mean confidence = {avg_conf:.2f}")
@@ -50,6 +138,7 @@ def main():
             meta_mutate()
             amplify_mutations(avg_conf)
             decay_meta_weights(last_conf, avg_conf)
+            flush_state()
             break
         else:
             print(f"[CYCLE {cycle}] Re-training...")
@@ -57,8 +146,13 @@ def main():
             amplify_mutations(avg_conf)
             decay_meta_weights(last_conf, avg_conf)
 
+        flush_state()
         last_conf = avg_conf
 
+    set_cycle(None)   # post-loop meta steps count in the totals only
+    print(f"[PRUNE] Ensemble scoring: {get_prune_stats()}")
+    flush_ledger()
+    print(f"[LEDGER] Writer: {ledger_stats()} compacted={compact_ledgers()}")
     ledger_summary = summarize_ledger()
     print(f"[LEDGER SUMMARY] {ledger_summary}")
     update_meta_weights()
@@ -70,6 +164,9 @@ def main():
     from arc_solver.step22_meta_diversify import diversify_meta
     diversify_meta(target=24, min_new=8, max_shifts=2)
     rehearse_meta(cap=24, diversity=0.5, min_sig_dist=0.4)
+    flush_state()
+    report()
+    tracer.write_trace()
 
     with open(SUBMISSION_PATH, "w") as f:
         json.dump(results, f, indent=2)
@@ -1,35 +1,27 @@
 #!/usr/bin/env python3
 # observer.py — learns from previous solver attempts and ranks rule types
 
-import json
 from pathlib import Path
-from collections import defaultdict
+from datetime import datetime
+from arc_solver.ledger_writer import append_event
+from arc_solver.ledger_aggregates import ledger_aggregates
 
 LEDGER_PATH = Path(__file__).parent / "observer_log.jsonl"
 
 def observe_event(event: dict):
-    """Append observer event to JSONL ledger."""
+    """Append observer event to JSONL ledger (buffered, see ledger_writer)."""
     try:
-        with open(LEDGER_PATH, "a") as f:
-            f.write(json.dumps(event) + "\n")
+        append_event(LEDGER_PATH, {"time": datetime.utcnow().isoformat(), **event})   # for time-range queries
     except Exception as e:
         print(f"[Observer] Write error: {e}")
 
-def analyze_observer():
-    """Aggregate observer data and return mean confidence by rule type."""
-    if not LEDGER_PATH.exists():
-        return {}
-    stats = defaultdict(lambda: {"count": 0, "mean_conf": 0.0})
+def analyze_observer(since=None, until=None):
+    """Aggregate observer data (optionally since <= time < until) and return mean confidence by rule type."""
+    stats = {}
     try:
-        with open(LEDGER_PATH) as f:
-            for line in f:
-                e = json.loads(line.strip())
-                t = e.get("rule_type", "unknown")
-                c = float(e.get("confidence", 0.0))
-                stats[t]["count"] += 1
-                stats[t]["mean_conf"] += c
-        for t in stats:
-            stats[t]["mean_conf"] /= stats[t]["count"]
+        # running aggregates: only lines appended since the last call are parsed
+        for t, rec in ledger_aggregates(LEDGER_PATH, since=since, until=until).items():
+            stats[t] = {"count": rec["count"], "mean_conf": rec["sum"] / rec["count"]}
     except Exception as e:
         print(f"[Observer] Read error: {e}")
     ranked = sorted(stats.items(), key=lambda x: x[1]["mean_conf"], reverse=True)
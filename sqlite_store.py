@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# sqlite_store.py — optional indexed SQLite engine for rule/meta/replay state
+#
+# Enabled with ARC_STATE_BACKEND=sqlite.  The state store then keeps
+# cache.json, meta_cache.json and meta_replay.json as rows of one `rules`
+# table (one row per dict key / list item) instead of whole-file JSON blobs,
+# and query_state() can fetch filtered, confidence-ranked slices without
+# materializing the full store.
+#
+#   python -m arc_solver.sqlite_store            # import existing JSON files
+#   python -m arc_solver.sqlite_store a.json ... # import specific files
+
+import os
+import sys
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+WORK = Path("/data/data/com.termux/files/home/arc_solver")
+DB_PATH = WORK / "state.sqlite3"
+SQLITE_FILES = ("cache.json", "meta_cache.json", "meta_replay.json")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stores (
+    store TEXT PRIMARY KEY,
+    kind  TEXT NOT NULL                -- 'dict' or 'list'
+);
+CREATE TABLE IF NOT EXISTS rules (
+    store      TEXT NOT NULL,          -- source file name, e.g. 'cache.json'
+    key        TEXT NOT NULL,          -- dict key, or list index
+    pos        INTEGER NOT NULL,       -- insertion order
+    task_id    TEXT,
+    rule_type  TEXT,
+    confidence REAL,
+    cmap_sig   TEXT,
+    body       TEXT NOT NULL,
+    PRIMARY KEY (store, key)
+);
+CREATE INDEX IF NOT EXISTS idx_rules_task ON rules(store, task_id);
+CREATE INDEX IF NOT EXISTS idx_rules_type ON rules(store, rule_type);
+CREATE INDEX IF NOT EXISTS idx_rules_conf ON rules(store, confidence DESC, pos);
+CREATE INDEX IF NOT EXISTS idx_rules_sig  ON rules(store, cmap_sig);
+CREATE INDEX IF NOT EXISTS idx_rules_pos  ON rules(store, pos);
+"""
+
+# ---------------- row columns ----------------
+
+def cmap_signature(cmap: Dict[Any, Any]) -> str:
+    """Order-independent 'k->v;...' signature of a color map."""
+    try:
+        items = sorted((int(k), int(v)) for k, v in (cmap or {}).items())
+    except Exception:
+        return ""
+    return ";".join(f"{k}->{v}" for k, v in items)
+
+def rule_columns(store: str, key: str, rec: Any) -> Tuple[Optional[str], Optional[str], Optional[float], Optional[str]]:
+    """Indexed columns (task_id, rule_type, confidence, cmap_sig) of one entry."""
+    if not isinstance(rec, dict):
+        return None, None, None, None
+    rule = rec["rule"] if isinstance(rec.get("rule"), dict) else rec   # step8 layout nests the rule
+    rtype = rule.get("type", rule.get("rule_type"))
+    try:
+        conf = float(rule.get("confidence", 0.0))
+    except Exception:
+        conf = 0.0
+    cmap = rule.get("color_map")
+    sig = cmap_signature(cmap) if isinstance(cmap, dict) else None
+    task_id = rule.get("task_id")
+    if task_id is None and store == "cache.json" and not key.startswith("rehearse_"):
+        task_id = key
+    return task_id, (None if rtype is None else str(rtype)), conf, sig
+
+def match_rule(store: str, key: str, rec: Any, type_suffix: str = None,
+               key_prefix: str = None, task_id: str = None, cmap_sig: str = None) -> bool:
+    """Python mirror of the SQL filters used by SqliteStore.query()."""
+    tid, rtype, _, sig = rule_columns(store, key, rec)
+    if type_suffix is not None and not (rtype or "").endswith(type_suffix):
+        return False
+    if key_prefix is not None and not key.startswith(key_prefix):
+        return False
+    if task_id is not None and tid != task_id:
+        return False
+    if cmap_sig is not None and sig != cmap_sig:
+        return False
+    return True
+
+# ---------------- engine ----------------
+
+class SqliteStore:
+    """Row-per-entry SQLite storage for the whitelisted JSON state files."""
+
+    def __init__(self, db_path: Path = DB_PATH, files=SQLITE_FILES):
+        self.db_path = Path(db_path)
+        self.files = set(files)
+        self._conn = None
+        self._pid = None
+        self._lock = threading.RLock()
+
+    def handles(self, path: Path) -> bool:
+        return Path(path).name in self.files
+
+    def _db(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._conn = None  # never reuse a connection inherited across fork()
+        if self._conn is None:
+            self._pid = os.getpid()
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def load(self, path: Path, missing=None):
+        """Materialize a whole store as the dict/list its JSON file would hold."""
+        store = Path(path).name
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT kind FROM stores WHERE store=?", (store,)).fetchone()
+            if row is None:
+                return missing
+            rows = db.execute("SELECT key, body FROM rules WHERE store=? ORDER BY pos", (store,)).fetchall()
+        if row[0] == "list":
+            return [json.loads(b) for _, b in rows]
+        return {k: json.loads(b) for k, b in rows}
+
+    def save(self, path: Path, data, keys=None):
+        """
+        Persist `data` in one transaction.  With `keys`, only those dict keys are
+        upserted (or deleted if gone); otherwise the store is replaced wholesale.
+        """
+        store = Path(path).name
+        kind = "list" if isinstance(data, list) else "dict"
+        if kind == "list":
+            items = [(f"{i:08d}", v) for i, v in enumerate(data)]
+        elif isinstance(data, dict):
+            items = [(str(k), v) for k, v in data.items()]
+        else:
+            return
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("INSERT OR REPLACE INTO stores(store, kind) VALUES (?, ?)", (store, kind))
+                if keys is None or kind == "list":
+                    db.execute("DELETE FROM rules WHERE store=?", (store,))
+                    db.executemany(
+                        "INSERT INTO rules(store, key, pos, task_id, rule_type, confidence, cmap_sig, body) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(store, k, i, *rule_columns(store, k, v), json.dumps(v)) for i, (k, v) in enumerate(items)])
+                    return
+                keys = {str(k) for k in keys}
+                present = {k for k, _ in items}
+                gone = [(store, k) for k in keys if k not in present]
+                if gone:
+                    db.executemany("DELETE FROM rules WHERE store=? AND key=?", gone)
+                top = db.execute("SELECT COALESCE(MAX(pos), -1) FROM rules WHERE store=?", (store,)).fetchone()[0]
+                rows = []
+                for k, v in items:
+                    if k in keys:
+                        top += 1
+                        rows.append((store, k, top, *rule_columns(store, k, v), json.dumps(v)))
+                db.executemany(
+                    "INSERT INTO rules(store, key, pos, task_id, rule_type, confidence, cmap_sig, body) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(store, key) DO UPDATE SET task_id=excluded.task_id, "
+                    "rule_type=excluded.rule_type, confidence=excluded.confidence, "
+                    "cmap_sig=excluded.cmap_sig, body=excluded.body",
+                    rows)
+
+    def query(self, path: Path, type_suffix: str = None, key_prefix: str = None,
+              task_id: str = None, cmap_sig: str = None, by_confidence: bool = False,
+              limit: int = None) -> List[Tuple[str, Any]]:
+        """Return (key, entry) rows matching the filters, in store or confidence order."""
+        store = Path(path).name
+        sql = ["SELECT key, body FROM rules WHERE store=?"]
+        args: List[Any] = [store]
+        # substr comparisons are case-sensitive like match_rule's endswith/startswith
+        # (LIKE is not); an empty suffix/prefix matches everything, as in Python
+        if type_suffix:
+            sql.append("AND substr(rule_type, -?) = ?")
+            args += [len(type_suffix), type_suffix]
+        if key_prefix:
+            sql.append("AND substr(key, 1, ?) = ?")
+            args += [len(key_prefix), key_prefix]
+        if task_id is not None:
+            sql.append("AND task_id=?")
+            args.append(task_id)
+        if cmap_sig is not None:
+            sql.append("AND cmap_sig=?")
+            args.append(cmap_sig)
+        sql.append("ORDER BY confidence DESC, pos" if by_confidence else "ORDER BY pos")
+        if limit is not None:
+            sql.append("LIMIT ?")
+            args.append(int(limit))
+        with self._lock:
+            rows = self._db().execute(" ".join(sql), args).fetchall()
+        return [(k, json.loads(b)) for k, b in rows]
+
+# ---------------- migration ----------------
+
+def migrate_json(paths=None, db_path: Path = DB_PATH) -> Dict[str, int]:
+    """Import existing JSON state files into the SQLite store (replacing rows)."""
+    engine = SqliteStore(db_path)
+    paths = [Path(p) for p in paths] if paths else [WORK / name for name in SQLITE_FILES]
+    counts = {}
+    for path in paths:
+        if not path.exists():
+            print(f"[SQLITE] Skipping missing {path}")
+            continue
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[SQLITE] Could not read {path.name}: {e}")
+            continue
+        engine.files.add(path.name)
+        engine.save(path, data)
+        counts[path.name] = len(data) if isinstance(data, (dict, list)) else 0
+        print(f"[SQLITE] Imported {counts[path.name]} entries from {path.name} → {engine.db_path}")
+    engine.close()
+    return counts
+
+if __name__ == "__main__":
+    migrate_json(sys.argv[1:] or None)
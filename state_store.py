@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# state_store.py — process-wide write-behind store for JSON state files
+#
+# Every state file (cache.json, meta_cache.json, meta_replay.json, memory.json,
+# rule_bank.json, ...) is read from disk once per process and then served from
+# memory.  Saves only update the in-memory copy and mark the file dirty; dirty
+# files are written back in one batch by flush_state() (called at cycle
+# boundaries by main_pipeline) and automatically at interpreter exit.
+# Modules keeping derived state beside a state file (e.g. step9's fingerprint
+# index) register a flush hook so it is persisted in the same full flush.
+#
+# load_state() returns the live object: callers that mutate it must call
+# save_state() afterwards, exactly as they used to call json.dump().
+#
+# With ARC_STATE_BACKEND=sqlite the rule cache, meta cache and replay buffer
+# are persisted through sqlite_store instead (batched upserts of dirty keys),
+# and query_state() pushes filtering/ranking down to its indexes.
+#
+# With ARC_TRACE set, loads, saves and writes appear as trace spans (tracer).
+
+import os
+import json
+import atexit
+import threading
+from pathlib import Path
+from arc_solver.tracer import span
+
+_MISSING = object()
+
+class StateStore:
+    """In-memory cache of JSON state files with dirty tracking."""
+
+    def __init__(self, backend: str = "json"):
+        self._data = {}       # Path -> loaded object (or _MISSING)
+        self._dirty = {}      # Path -> set of dirty top-level keys, None = whole file
+        self._lock = threading.RLock()
+        self.read_only = False  # pool workers never write state back
+        self.loads = 0
+        self.flushes = 0
+        self.hooks = []         # called after every full flush
+        self.sqlite = None
+        if backend == "sqlite":
+            from arc_solver.sqlite_store import SqliteStore
+            self.sqlite = SqliteStore()
+
+    def _uses_sqlite(self, path: Path) -> bool:
+        return self.sqlite is not None and self.sqlite.handles(path)
+
+    def load(self, path: Path, default=None):
+        path = Path(path)
+        with self._lock, span(f"load {path.name}", "state"):
+            if path not in self._data:
+                if self._uses_sqlite(path):
+                    self._data[path] = self.sqlite.load(path, _MISSING)
+                else:
+                    self._data[path] = _read_json(path)
+                self.loads += 1
+            data = self._data[path]
+        return default if data is _MISSING else data
+
+    def save(self, path: Path, data, keys=None):
+        path = Path(path)
+        with self._lock, span(f"save {path.name}", "state"):
+            self._data[path] = data
+            if keys is None:
+                self._dirty[path] = None
+            else:
+                prev = self._dirty.get(path, set())
+                if prev is not None:
+                    self._dirty[path] = prev | set(keys)
+
+    def dirty_keys(self, path: Path):
+        """Dirty top-level keys of `path` (None = whole file, empty set = clean)."""
+        with self._lock:
+            keys = self._dirty.get(Path(path), set())
+            return None if keys is None else set(keys)
+
+    def discard(self, path: Path = None):
+        """Forget cached state (all files if `path` is None) without writing it."""
+        with self._lock:
+            if path is None:
+                self._data.clear()
+                self._dirty.clear()
+            else:
+                self._data.pop(Path(path), None)
+                self._dirty.pop(Path(path), None)
+
+    def query(self, path: Path, by_confidence: bool = False, limit: int = None, **filters):
+        """
+        (key, entry) pairs of a dict-or-list state file matching `filters`
+        (type_suffix, key_prefix, task_id, cmap_sig), optionally ranked by confidence.
+        """
+        path = Path(path)
+        # read-only workers may hold unflushed local edits: answer those from memory
+        if self._uses_sqlite(path) and not (self.read_only and path in self._dirty):
+            self.flush([path])
+            return self.sqlite.query(path, by_confidence=by_confidence, limit=limit, **filters)
+        from arc_solver.sqlite_store import match_rule, rule_columns
+        data = self.load(path, {})
+        items = list(enumerate(data)) if isinstance(data, list) else list(data.items()) if isinstance(data, dict) else []
+        items = [(str(k), v) for k, v in items]
+        store = path.name
+        rows = [(k, v) for k, v in items if match_rule(store, k, v, **filters)]
+        if by_confidence:
+            rows.sort(key=lambda kv: rule_columns(store, kv[0], kv[1])[2] or 0.0, reverse=True)
+        return rows if limit is None else rows[:limit]
+
+    def flush(self, paths=None) -> int:
+        """
+        Write dirty files back to disk; returns the number of files written.
+        A full flush (paths None) then runs the flush hooks.
+        """
+        if self.read_only:
+            return 0
+        with self._lock:
+            targets = list(self._dirty) if paths is None else [Path(p) for p in paths if Path(p) in self._dirty]
+            written = 0
+            for path in targets:
+                data = self._data.get(path, _MISSING)
+                if data is not _MISSING:
+                    with span(f"write {path.name}", "state"):
+                        if self._uses_sqlite(path):
+                            self.sqlite.save(path, data, self._dirty[path])
+                        else:
+                            _write_json(path, data)
+                    written += 1
+                self._dirty.pop(path, None)
+            if written:
+                self.flushes += 1
+            if paths is None:
+                for hook in self.hooks:
+                    hook()
+            return written
+
+def _read_json(path: Path):
+    try:
+        if path.exists():
+            with open(path) as f:
+                return json.load(f)
+    except Exception:
+        pass
+    return _MISSING
+
+def _write_json(path: Path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+STORE = StateStore(os.environ.get("ARC_STATE_BACKEND", "json"))
+atexit.register(STORE.flush)
+
+def load_state(path: Path, default=None):
+    """Return the cached contents of a JSON state file (`default` if missing/corrupt)."""
+    return STORE.load(path, default)
+
+def save_state(path: Path, data, keys=None):
+    """Replace the cached contents of a state file and mark it dirty."""
+    STORE.save(path, data, keys)
+
+def query_state(path: Path, by_confidence: bool = False, limit: int = None, **filters):
+    """Filtered (key, entry) rows of a state file; see StateStore.query."""
+    return STORE.query(path, by_confidence, limit, **filters)
+
+def add_flush_hook(fn):
+    """Call `fn()` after every full flush_state() (and at exit) in the writing process."""
+    STORE.hooks.append(fn)
+
+def flush_state(paths=None) -> int:
+    """Write all (or the given) dirty state files to disk."""
+    with span("flush_state", "state"):
+        return STORE.flush(paths)
+
+def discard_state(path: Path = None):
+    """Drop cached state so the next load re-reads from disk."""
+    STORE.discard(path)
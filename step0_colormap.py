@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# step0_colormap.py — compact color-map value type
+#
+# A ColorMap is a partial map over the ARC colors 0..9.  It is stored as a
+# 10-byte uint8 LUT (undefined colors map to themselves, so apply() is a
+# single gather) plus a 10-bit defined-mask.  Both are summarized by one
+# packed integer key (base 11, digit k = lut[k]+1 where defined, else 0),
+# which gives O(1) hashing/equality and replaces the per-step signature
+# strings.  to_dict()/from_dict() round-trip losslessly through JSON.
+#
+# norm_cmap() is the lenient {int: int} normalizer for raw rule dicts that may
+# still carry pairs outside 0..9.
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+N_COLORS = 10
+_POW11 = np.array([11 ** k for k in range(N_COLORS)], dtype=np.int64)
+_BITS = np.array([1 << k for k in range(N_COLORS)], dtype=np.int64)
+_IDENT = np.arange(N_COLORS, dtype=np.uint8)
+_P11 = [11 ** k for k in range(N_COLORS)]
+
+def norm_cmap(cmap: Dict[Any, Any]) -> Dict[int, int]:
+    """Coerce to {int: int} (insertion order kept), drop invalid keys."""
+    out = {}
+    for k, v in (cmap or {}).items():
+        try:
+            out[int(k)] = int(v)
+        except Exception:
+            continue
+    return out
+
+class ColorMap:
+    """Immutable partial color → color map; undefined colors are left unchanged."""
+    __slots__ = ("lut", "mask", "key")
+
+    def __init__(self, lut, mask: int):
+        mask = int(mask)
+        if not isinstance(lut, (bytes, bytearray)):   # bytes: already identity where undefined
+            lut = np.where(_defined(mask), np.asarray(lut), _IDENT).astype(np.uint8).tobytes()
+        self.lut = np.frombuffer(bytes(lut), dtype=np.uint8)   # read-only
+        self.mask = mask
+        self.key = sum((lut[k] + 1) * _P11[k] for k in range(N_COLORS) if mask >> k & 1)
+
+    # ---------- construction ----------
+    @classmethod
+    def from_dict(cls, cmap: Dict[Any, Any], strict: bool = False) -> "ColorMap":
+        """
+        From a {color: color} dict (int or str keys, as loaded from JSON).
+        Pairs outside 0..9 are dropped, or raise ValueError if `strict`.
+        """
+        if isinstance(cmap, ColorMap):
+            return cmap
+        lut, mask = bytearray(range(N_COLORS)), 0
+        for k, v in norm_cmap(cmap).items():
+            if 0 <= k < N_COLORS and 0 <= v < N_COLORS:
+                lut[k] = v
+                mask |= 1 << k
+            elif strict:
+                raise ValueError(f"color pair {k}->{v} outside 0..9")
+        return cls(lut, mask)
+
+    @classmethod
+    def from_lut(cls, lut: Iterable[int], defined: Iterable[bool] = None) -> "ColorMap":
+        """From a length-10 LUT; `defined` defaults to every color."""
+        defined = np.ones(N_COLORS, dtype=bool) if defined is None else np.asarray(defined, dtype=bool)
+        return cls(np.asarray(lut), int(_BITS[defined].sum()))
+
+    @classmethod
+    def from_key(cls, key: int) -> "ColorMap":
+        digits = (int(key) // _POW11) % 11
+        return cls(np.maximum(digits - 1, 0), int(_BITS[digits > 0].sum()))
+
+    @classmethod
+    def identity(cls) -> "ColorMap":
+        return cls(_IDENT, (1 << N_COLORS) - 1)
+
+    def to_dict(self) -> Dict[int, int]:
+        """{color: color} of the defined colors, ascending (JSON-ready)."""
+        return {int(k): int(self.lut[k]) for k in self}
+
+    def __reduce__(self):
+        return (ColorMap.from_key, (self.key,))
+
+    # ---------- mapping protocol ----------
+    @property
+    def defined(self) -> np.ndarray:
+        return _defined(self.mask)
+
+    def __len__(self) -> int:
+        return bin(self.mask).count("1")
+
+    def __iter__(self) -> Iterator[int]:
+        return (k for k in range(N_COLORS) if self.mask >> k & 1)
+
+    def __contains__(self, k) -> bool:
+        return isinstance(k, (int, np.integer)) and 0 <= k < N_COLORS and bool(self.mask >> int(k) & 1)
+
+    def __getitem__(self, k) -> int:
+        if k not in self:
+            raise KeyError(k)
+        return int(self.lut[k])
+
+    def get(self, k, default=None):
+        return self[k] if k in self else default
+
+    def keys(self) -> List[int]:
+        return list(self)
+
+    def values(self) -> List[int]:
+        return [int(self.lut[k]) for k in self]
+
+    def items(self) -> List[Tuple[int, int]]:
+        return [(k, int(self.lut[k])) for k in self]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ColorMap) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"ColorMap({self.to_dict()})"
+
+    # ---------- operations ----------
+    def apply(self, grid) -> np.ndarray:
+        """The map applied to every cell of a uint8 grid (one LUT gather)."""
+        return self.lut[np.asarray(grid)]
+
+    def compose(self, other: "ColorMap") -> "ColorMap":
+        """self, then `other`: c -> other(self(c))."""
+        return ColorMap(other.lut[self.lut], self.mask | int(_BITS[other.defined[self.lut]].sum()))
+
+    def merge(self, other: "ColorMap") -> "ColorMap":
+        """Union of both maps; `other` wins where both are defined."""
+        return ColorMap(np.where(other.defined, other.lut, self.lut), self.mask | other.mask)
+
+    def invert(self) -> Optional["ColorMap"]:
+        """v -> k for every defined pair, or None if two colors share an output."""
+        keys = np.flatnonzero(self.defined)
+        vals = self.lut[keys]
+        if len(np.unique(vals)) != len(vals):
+            return None
+        lut = _IDENT.copy()
+        lut[vals] = keys
+        return ColorMap(lut, int(_BITS[vals].sum()))
+
+    def shift(self, s: int) -> "ColorMap":
+        """Outputs shifted by `s` modulo 10."""
+        return ColorMap((self.lut.astype(np.int64) + s) % N_COLORS, self.mask)
+
+    def drop(self, k: int) -> "ColorMap":
+        """The map without color `k`."""
+        return ColorMap(self.lut, self.mask & ~(1 << int(k)))
+
+def _defined(mask: int) -> np.ndarray:
+    return (int(mask) & _BITS) > 0
+
+def as_colormap(cmap) -> ColorMap:
+    """ColorMap of a ColorMap, {color: color} dict or None."""
+    return cmap if isinstance(cmap, ColorMap) else ColorMap.from_dict(cmap or {})
+
+def stack_luts(cmaps: List[ColorMap]) -> np.ndarray:
+    """(C,10) uint8 matrix whose row c is cmaps[c].lut."""
+    if not cmaps:
+        return np.zeros((0, N_COLORS), dtype=np.uint8)
+    return np.frombuffer(b"".join(as_colormap(c).lut.tobytes() for c in cmaps),
+                         dtype=np.uint8).reshape(len(cmaps), N_COLORS)
+
+def pack_keys(luts: np.ndarray, defined: np.ndarray) -> np.ndarray:
+    """ColorMap keys of (N,10) LUT rows restricted to (N,10) defined-masks."""
+    return ((np.asarray(luts, dtype=np.int64) + 1) * _POW11 * np.asarray(defined)).sum(axis=1)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# step0_features.py — content-addressed per-grid feature store
+#
+# The same grids are converted, hashed, segmented and histogrammed by many
+# learners on every cycle.  features(grid) returns the GridFeatures record for
+# a grid's contents (keyed by a fast content hash), computing each feature
+# lazily the first time it is asked for and keeping it until the record is
+# evicted.  Records live in one process-wide LRU bounded by a memory budget
+# (ARC_FEATURE_BUDGET_MB, default 64).
+#
+# Records hold the canonical uint8 Grid (see step0_grid); cached arrays are
+# read-only, so callers that need to modify a grid must copy it.
+
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
+from arc_solver.step0_grid import Grid, as_grid
+
+BUDGET_MB = float(os.environ.get("ARC_FEATURE_BUDGET_MB", "64"))
+_RECORD_OVERHEAD = 512   # rough bytes per record besides its arrays
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return 64 + sum(_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return 8 * len(value) + sum(_nbytes(v) for v in value)
+    return 32
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _freeze(v)
+    return value
+
+class GridFeatures:
+    """Lazily computed, memoized features of one grid's contents."""
+    __slots__ = ("key", "array", "nbytes", "_store", "_memo")
+
+    def __init__(self, key: bytes, array: Grid, store: "FeatureStore" = None):
+        self.key = key
+        self.array = array
+        self.nbytes = _RECORD_OVERHEAD + array.nbytes
+        self._store = store
+        self._memo: Dict[Any, Any] = {}
+
+    def derive(self, name: Any, fn: Callable[[np.ndarray], Any]) -> Any:
+        """Memoized fn(array) under `name`; results are frozen and counted in the budget."""
+        try:
+            return self._memo[name]
+        except KeyError:
+            pass
+        value = _freeze(fn(self.array))
+        self._memo[name] = value
+        size = _nbytes(value)
+        self.nbytes += size
+        if self._store is not None:
+            self._store._grow(self, size)
+        return value
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.array.shape
+
+    @property
+    def hist(self) -> np.ndarray:
+        """Pixel count per color 0..9."""
+        return self.derive("hist", lambda a: np.bincount(np.asarray(a).ravel(), minlength=10))
+
+    @property
+    def colors(self) -> List[int]:
+        """Colors present, ascending."""
+        return self.derive("colors", lambda a: np.flatnonzero(self.hist).tolist())
+
+    @property
+    def objects(self) -> List[Dict]:
+        """find_objects() of the grid (4-connectivity, mixed colors)."""
+        from arc_solver.step1_objects import find_objects
+        return self.derive("objects", find_objects)
+
+    @property
+    def bboxes(self) -> List[Tuple[int, int, int, int]]:
+        """(y1, x1, y2, x2) of every object, half-open like find_objects()."""
+        return self.derive("bboxes", lambda a: [o["bbox"] for o in self.objects])
+
+    @property
+    def symmetry(self) -> Dict[str, bool]:
+        """Which of the basic mirror/rotation symmetries the grid has."""
+        def _sym(a):
+            sq = a.shape[0] == a.shape[1]
+            return {
+                "flip_x": bool(np.array_equal(a, a[::-1, :])),
+                "flip_y": bool(np.array_equal(a, a[:, ::-1])),
+                "rot180": bool(np.array_equal(a, a[::-1, ::-1])),
+                "rot90": bool(sq and np.array_equal(a, np.rot90(a))),
+                "transpose": bool(sq and np.array_equal(a, a.T)),
+            }
+        return self.derive("symmetry", _sym)
+
+class FeatureStore:
+    """LRU of GridFeatures keyed by grid content, bounded by `budget_bytes`."""
+
+    def __init__(self, budget_bytes: int):
+        self.budget = int(budget_bytes)
+        self.used = 0
+        self._records: "OrderedDict[bytes, GridFeatures]" = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, grid) -> GridFeatures:
+        a = as_grid(grid)
+        key = a.key
+        rec = self._records.get(key)
+        if rec is not None:
+            self._records.move_to_end(key)
+            self.hits += 1
+            return rec
+        self.misses += 1
+        rec = GridFeatures(key, a, self)
+        self._records[key] = rec
+        self.used += rec.nbytes
+        self._evict(keep=key)
+        return rec
+
+    def _grow(self, rec: GridFeatures, size: int):
+        if self._records.get(rec.key) is rec:
+            self.used += size
+            self._evict(keep=rec.key)
+
+    def _evict(self, keep: bytes = None):
+        while self.used > self.budget and len(self._records) > 1:
+            key, rec = next(iter(self._records.items()))
+            if key == keep:
+                self._records.move_to_end(key)
+                key, rec = next(iter(self._records.items()))
+            del self._records[key]
+            self.used -= rec.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self._records.clear()
+        self.used = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"records": len(self._records), "bytes": self.used, "budget": self.budget,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+FEATURES = FeatureStore(int(BUDGET_MB * 1024 * 1024))
+
+def features(grid) -> GridFeatures:
+    """Feature record of `grid` (list of lists or array) from the shared store."""
+    return FEATURES.get(grid)
+
+def grid_array(grid) -> Grid:
+    """Canonical Grid of `grid`, shared between all callers."""
+    return FEATURES.get(grid).array
+
+def feature_stats() -> Dict[str, int]:
+    return FEATURES.stats()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# step0_grid.py — canonical compact grid type
+#
+# ARC colors fit in 0..9, so every grid inside the solver is a read-only
+# uint8 array: a Grid.  as_grid() is the single conversion point from JSON
+# lists (or arrays of any dtype); .tolist() is the way back out to JSON.
+# Grid.key is a content hash computed once and cached on the instance.
+#
+# Arithmetic and comparisons on a Grid return plain ndarrays, so a Grid is
+# only ever a grid as loaded or reshaped (slices/rotations stay Grids).
+# Hot loops may call np.asarray(grid) to skip the subclass dispatch.
+
+from hashlib import blake2b
+import numpy as np
+
+GRID_DTYPE = np.uint8
+
+class Grid(np.ndarray):
+    """Read-only uint8 grid with a cached content hash."""
+
+    def __array_finalize__(self, obj):
+        self._key = None
+
+    def __array_wrap__(self, arr, context=None, return_scalar=False):
+        arr = arr.view(np.ndarray)
+        return arr[()] if return_scalar else arr
+
+    def __reduce__(self):
+        # pickle as a plain array; as_grid() restores the view on load
+        return (as_grid, (np.asarray(self),))
+
+    @property
+    def key(self) -> bytes:
+        """blake2b digest of shape + contents (cached; Grids are read-only)."""
+        if self._key is None:
+            self._key = grid_key(self)
+        return self._key
+
+def grid_key(a: np.ndarray) -> bytes:
+    """Content hash of a uint8 grid (shape included)."""
+    h = blake2b(digest_size=16)
+    h.update(np.asarray(a.shape, dtype=np.int64).tobytes())
+    h.update(np.ascontiguousarray(a).tobytes())
+    return h.digest()
+
+def as_grid(data) -> Grid:
+    """
+    Canonical Grid of a list-of-lists or array: values clipped to 0..9
+    (before the cast, so out-of-range values don't wrap), 2D, read-only.
+    Grids are returned unchanged.
+    """
+    if isinstance(data, Grid):
+        return data
+    a = np.asarray(data)
+    if a.dtype != GRID_DTYPE:
+        if a.dtype.kind == "f":
+            a = np.nan_to_num(a, nan=0)
+        a = np.clip(a, 0, 9).astype(GRID_DTYPE)
+    elif a.size and a.max() > 9:
+        a = np.minimum(a, 9)
+    if a.ndim != 2:
+        a = a.reshape((a.shape[0], -1)) if a.ndim else a.reshape((1, 1))
+    g = a.view(Grid)
+    if isinstance(data, np.ndarray) and np.shares_memory(g, data):
+        g = g.copy()      # never freeze the caller's own array
+    g.setflags(write=False)
+    return g
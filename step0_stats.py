@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# step0_stats.py — constant-space streaming statistics for memory stores
+#
+# A stats record is a plain JSON-ready dict updated in O(1) per value:
+#   count, Welford mean / m2 (→ variance), min, max, an EWMA (weight
+#   ARC_STATS_EWMA_ALPHA on the newest value) and a fixed HIST_BINS-bin
+#   histogram over [0, 1] (values outside are clipped into the edge bins)
+#   from which percentiles are interpolated.
+# from_values() builds the same record from a legacy list of values, so
+# stores can migrate their old unbounded lists on load.
+
+import os
+import math
+from typing import Any, Dict, Iterable
+
+EWMA_ALPHA = float(os.environ.get("ARC_STATS_EWMA_ALPHA", "0.1"))
+HIST_BINS = 20
+
+def new_stats() -> Dict[str, Any]:
+    return {"count": 0, "mean": 0.0, "m2": 0.0, "min": None, "max": None,
+            "ewma": None, "hist": [0] * HIST_BINS}
+
+def push(stats: Dict[str, Any], x: float) -> Dict[str, Any]:
+    """Fold one value into `stats` (in place); returns it."""
+    x = float(x)
+    stats["count"] += 1
+    delta = x - stats["mean"]
+    stats["mean"] += delta / stats["count"]
+    stats["m2"] += delta * (x - stats["mean"])
+    stats["min"] = x if stats["min"] is None else min(stats["min"], x)
+    stats["max"] = x if stats["max"] is None else max(stats["max"], x)
+    stats["ewma"] = x if stats["ewma"] is None else EWMA_ALPHA * x + (1.0 - EWMA_ALPHA) * stats["ewma"]
+    b = 0 if not x > 0.0 else min(HIST_BINS - 1, int(x * HIST_BINS))   # NaN → first bin
+    stats["hist"][b] += 1
+    return stats
+
+def from_values(values: Iterable[float]) -> Dict[str, Any]:
+    """Stats record of a legacy list of values (oldest first)."""
+    stats = new_stats()
+    for x in values:
+        push(stats, x)
+    return stats
+
+def variance(stats: Dict[str, Any]) -> float:
+    """Population variance."""
+    return stats["m2"] / stats["count"] if stats["count"] else 0.0
+
+def std(stats: Dict[str, Any]) -> float:
+    return math.sqrt(max(0.0, variance(stats)))
+
+def percentile(stats: Dict[str, Any], q: float) -> float:
+    """Approximate q-th percentile (0..100) from the histogram, clamped to [min, max]."""
+    n = stats["count"]
+    if not n:
+        return 0.0
+    target = max(0.0, min(100.0, q)) / 100.0 * n
+    seen = 0
+    for b, c in enumerate(stats["hist"]):
+        if c and seen + c >= target:
+            x = (b + (target - seen) / c) / HIST_BINS
+            return min(max(x, stats["min"]), stats["max"])
+        seen += c
+    return stats["max"]
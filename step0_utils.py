@@ -4,36 +4,28 @@
 import numpy as np
 import sys
 import time
+from arc_solver.step0_grid import Grid, as_grid
+from arc_solver.step0_resample import resize, scale as _scale
 
-def to_np(grid):
-    """Convert grid (list of lists) to NumPy array."""
-    return np.array(grid, dtype=np.int64)
+def to_np(grid) -> Grid:
+    """Convert grid (list of lists) to the canonical uint8 Grid."""
+    return as_grid(grid)
 
 def to_grid(array):
     """Convert NumPy array back to grid (list of lists)."""
     return array.tolist()
 
 def fit_to_shape(a: np.ndarray, out_h: int, out_w: int) -> np.ndarray:
-    """Resize by nearest replication."""
-    in_h, in_w = a.shape
-    out = np.zeros((out_h, out_w), dtype=a.dtype)
-    for i in range(out_h):
-        for j in range(out_w):
-            out[i, j] = a[i * in_h // out_h, j * in_w // out_w]
-    return out
+    """Resize by nearest replication (one gather; see step0_resample)."""
+    return resize(a, out_h, out_w)
 
 def scale_nearest(a: np.ndarray, scale: float) -> np.ndarray:
     """Scale an array by nearest-neighbor interpolation."""
-    out_h = max(1, int(round(a.shape[0] * scale)))
-    out_w = max(1, int(round(a.shape[1] * scale)))
-    return fit_to_shape(a, out_h, out_w)
-
-def ensure_integrity(a: np.ndarray) -> np.ndarray:
-    """Clip invalid values and ensure 2D int64 array."""
-    a = np.nan_to_num(a, nan=0).astype(np.int64)
-    if a.ndim != 2:
-        a = a.reshape((a.shape[0], -1))
-    return np.clip(a, 0, 9)
+    return _scale(a, scale)
+
+def ensure_integrity(a) -> Grid:
+    """Clip invalid values to 0..9 and return a 2D uint8 Grid."""
+    return as_grid(a)
 
 def compute_confidence(pred: np.ndarray, target: np.ndarray) -> float:
     """Compute confidence as elementwise accuracy."""
@@ -1,34 +1,31 @@
 #!/usr/bin/env python3
 # step10_meta_mutate.py — heuristic meta-mutation for cached rules
-import json, random
+import random
 import numpy as np
 from pathlib import Path
+from arc_solver.state_store import load_state, save_state
+from arc_solver.step0_colormap import ColorMap, as_colormap
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 CACHE_PATH = WORK / "rule_cache.json"
 
 def _load_cache():
-    if CACHE_PATH.exists():
-        try:
-            with open(CACHE_PATH) as f:
-                return json.load(f)
-        except Exception:
-            pass
-    return {}
+    return load_state(CACHE_PATH, {})
 
 def _save_cache(data):
-    with open(CACHE_PATH, "w") as f:
-        json.dump(data, f, indent=2)
+    save_state(CACHE_PATH, data)
 
 def mutate_color_map(cmap: dict) -> dict:
     """Randomly perturb color map values within range [0,9]."""
-    mutated = dict(cmap)
-    if not mutated:
-        return mutated
-    for k in list(mutated.keys()):
+    cm = as_colormap(cmap)
+    if not cm:
+        return {}
+    lut = np.array(cm.lut)
+    for k in cm:
         if random.random() < 0.3:  # mutate 30% of entries
-            mutated[k] = int((mutated[k] + random.choice([-1, 1])) % 10)
-    return mutated
+            lut[k] = (int(lut[k]) + random.choice([-1, 1])) % 10
+    return ColorMap(lut, cm.mask).to_dict()
 
 def mutate_rule(rule: dict) -> dict:
     """Create a mutated copy of a rule."""
@@ -39,6 +36,7 @@ def mutate_rule(rule: dict) -> dict:
         new_rule["confidence"] = round(float(new_rule["confidence"]) * random.uniform(0.9, 1.1), 3)
     return new_rule
 
+@timed("meta_mutate")
 def meta_mutate():
     """Apply mutation to cached rules for exploration."""
     cache = _load_cache()
@@ -1,34 +1,37 @@
 #!/usr/bin/env python3
 # step11_self_correct.py — self-validation and corrective rule synthesis
 import numpy as np
-import json
 from pathlib import Path
 from arc_solver.step0_utils import ensure_integrity
 from arc_solver.step8_memory_cache import update_cache
 from arc_solver.step7_autolearn import log_event
+from arc_solver.state_store import save_state
+from arc_solver.step0_colormap import ColorMap
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 CORR_PATH = WORK / "self_corrections.json"
 
 def validate_prediction(pred, target):
     """Return accuracy score for grid comparison."""
-    pred = ensure_integrity(np.array(pred))
-    target = ensure_integrity(np.array(target))
+    pred = ensure_integrity(pred)
+    target = ensure_integrity(target)
     if pred.shape != target.shape:
         return 0.0
     return float(np.mean(pred == target))
 
 def generate_correction(pred, target):
     """Infer corrective color mapping from mismatched cells."""
-    pred = ensure_integrity(np.array(pred))
-    target = ensure_integrity(np.array(target))
+    pred = ensure_integrity(pred)
+    target = ensure_integrity(target)
     diff_mask = pred != target
-    cmap = {}
-    for v in np.unique(pred[diff_mask]):
-        if v in target:
-            cmap[int(v)] = int(np.bincount(target[diff_mask]).argmax())
+    # every wrong color that occurs in the target maps to the commonest target color among the misses
+    wrong = np.bincount(pred[diff_mask], minlength=10) > 0
+    fixable = wrong & (np.bincount(target.ravel(), minlength=10) > 0)
+    fix = ColorMap.from_dict({})
+    if fixable.any():
+        fix = ColorMap.from_lut(np.full(10, np.bincount(target[diff_mask]).argmax()), fixable)
     conf = round(validate_prediction(pred, target), 3)
-    return {"type": "color_map_fix", "color_map": cmap, "confidence": conf}
+    return {"type": "color_map_fix", "color_map": fix.to_dict(), "confidence": conf}
 
 def apply_self_correction(task, preds):
     """Compare predictions to known outputs; update cache if fix found."""
@@ -43,7 +46,6 @@ def apply_self_correction(task, preds):
             log_event(fix["type"], fix["confidence"])
             corrections.append(fix)
     if corrections:
-        with open(CORR_PATH, "w") as f:
-            json.dump(corrections, f, indent=2)
+        save_state(CORR_PATH, corrections)
         print(f"[CORRECT] Applied {len(corrections)} fixes.")
     return corrections
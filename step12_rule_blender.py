@@ -14,25 +14,14 @@ Strategy:
 
 from __future__ import annotations
 from typing import List, Dict, Any
+from arc_solver.step0_colormap import ColorMap, as_colormap
 
-def _rule_to_color_map(rule: Dict[str, Any]) -> Dict[int, int]:
+def _rule_to_color_map(rule: Dict[str, Any]) -> ColorMap:
     """Convert different rule types to a canonical color_map."""
-    if not rule:
-        return {}
-    rtype = rule.get("type", "color_map")
-    cmap = {}
-
-    if rtype in ("color_map", "color_map_fix"):
-        raw = rule.get("color_map", {})
-        # normalize possible numpy/int types
-        for k, v in raw.items():
-            ck = int(k)
-            cv = int(v)
-            cmap[ck] = cv
-    else:
-        # fallback – unknown rule type
-        pass
-    return cmap
+    if rule and rule.get("type", "color_map") in ("color_map", "color_map_fix"):
+        return as_colormap(rule.get("color_map", {}))
+    # fallback – unknown rule type
+    return as_colormap({})
 
 def blend_rules(rules: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -51,8 +40,6 @@ def blend_rules(rules: List[Dict[str, Any]]) -> Dict[str, Any]:
         total_conf += conf
         cmap = _rule_to_color_map(r)
         for inc, outc in cmap.items():
-            inc = int(inc)
-            outc = int(outc)
             if inc not in votes:
                 votes[inc] = {}
             votes[inc][outc] = votes[inc].get(outc, 0.0) + conf
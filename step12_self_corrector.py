@@ -5,7 +5,20 @@ Accepts either dict or list[dict] color_maps, never raises attribute errors.
 """
 
 import numpy as np
+from arc_solver.step0_features import grid_array
+from arc_solver.step0_colormap import ColorMap, as_colormap
+from arc_solver.instrument import timed
 
+def _pair_fix(pair: dict) -> ColorMap:
+    """Majority output color for each input color that changes in this pair."""
+    inp = grid_array(pair["input"])
+    out = grid_array(pair["output"])
+    mismatch = (inp != out)
+    joint = np.bincount(inp.ravel() * np.intp(10) + out.ravel(), minlength=100).reshape(10, 10)
+    changed = np.bincount(inp[mismatch], minlength=10) > 0
+    return ColorMap.from_lut(joint.argmax(axis=1), changed)
+
+@timed("self_correct")
 def apply_self_correction(task: dict, color_maps) -> list[dict]:
     """Generate corrective color maps safely from training pairs."""
     fixes = []
@@ -17,19 +30,16 @@ def apply_self_correction(task: dict, color_maps) -> list[dict]:
         elif not isinstance(color_maps, list):
             color_maps = []
 
+        # per-pair corrections don't depend on the map: derive them once
+        pair_fixes = {}
         for cmap in color_maps:
             if not isinstance(cmap, dict):
                 continue
-            for pair in train_pairs:
-                inp = np.array(pair["input"], dtype=int)
-                out = np.array(pair["output"], dtype=int)
-                mismatch = (inp != out)
-                if np.any(mismatch):
-                    corrected = dict(cmap)
-                    for ci in np.unique(inp[mismatch]):
-                        co = np.bincount(out[inp == ci]).argmax()
-                        corrected[int(ci)] = int(co)
-                    fixes.append(corrected)
+            for pi, pair in enumerate(train_pairs):
+                if pi not in pair_fixes:
+                    pair_fixes[pi] = _pair_fix(pair)
+                if pair_fixes[pi]:
+                    fixes.append(as_colormap(cmap).merge(pair_fixes[pi]).to_dict())
         if fixes:
             print(f"[CORRECT] Applied {len(fixes)} fixes.")
     except Exception as e:
@@ -15,26 +15,24 @@ import numpy as np
 from pathlib import Path
 from typing import Dict, List, Any
 from collections import defaultdict
+from arc_solver.state_store import load_state, save_state
+from arc_solver.step0_colormap import as_colormap
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 CACHE_PATH = WORK / "cache.json"
 MEM_PATH = WORK / "autolearn_memory.json"
 META_PATH = WORK / "meta_cache.json"
+CLUSTER_DIST = 0.3    # a rule joins the first cluster whose leader is closer than this
+CLUSTER_BLOCK = 256   # rules compared against all leaders per broadcast
+MISSING = -1          # LUT sentinel for an input color the map doesn't define
 
 
 def _load_json(path: Path) -> Any:
-    if not path.exists():
-        return {}
-    try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except Exception:
-        return {}
+    return load_state(path, {})
 
 
 def _save_json(path: Path, data: Any):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    save_state(path, data)
 
 
 def _color_map_distance(map1: Dict[str, int], map2: Dict[str, int]) -> float:
@@ -50,11 +48,112 @@ def _color_map_distance(map1: Dict[str, int], map2: Dict[str, int]) -> float:
     return diff / len(keys)
 
 
+def _encode_maps(maps: List[Dict[Any, Any]]):
+    """
+    (N,10) int LUT matrix (MISSING where undefined) plus (N,10) defined-mask,
+    or None if some map can't be encoded without changing _color_map_distance:
+    keys must all be canonical ints 0..9 or all their decimal strings, values ints.
+    """
+    n = len(maps)
+    lut = np.full((n, 10), MISSING, dtype=np.int64)
+    defined = np.zeros((n, 10), dtype=bool)
+    key_kind = None
+    for i, cmap in enumerate(maps):
+        if not isinstance(cmap, dict):
+            return None
+        for k, v in cmap.items():
+            kind = type(k)
+            if kind not in (str, int) or (key_kind is not None and kind is not key_kind):
+                return None
+            key_kind = kind
+            if kind is str and not (len(k) == 1 and k.isdigit()):
+                return None
+            c = int(k)
+            if not 0 <= c <= 9 or type(v) is not int:
+                return None
+            lut[i, c] = v
+            defined[i, c] = True
+    return lut, defined
+
+def _lut_distances(lut_a, def_a, lut_b, def_b) -> np.ndarray:
+    """(A,B) matrix of _color_map_distance between encoded maps, in one broadcast."""
+    union = def_a[:, None, :] | def_b[None, :, :]
+    diff = (lut_a[:, None, :] != lut_b[None, :, :]) & union
+    n_keys = union.sum(axis=2)
+    return np.where(n_keys > 0, diff.sum(axis=2) / np.maximum(n_keys, 1), 0.0)
+
+def _cluster_slow(rules: List[Dict[str, Any]]) -> List[int]:
+    """Reference greedy leader clustering over the dict maps."""
+    leaders: List[int] = []
+    assign = []
+    for i, rule in enumerate(rules):
+        for c, lead in enumerate(leaders):
+            if _color_map_distance(rule["color_map"], rules[lead]["color_map"]) < CLUSTER_DIST:
+                assign.append(c)
+                break
+        else:
+            assign.append(len(leaders))
+            leaders.append(i)
+    return assign
+
+def cluster_rules(rules: List[Dict[str, Any]]) -> List[int]:
+    """
+    Greedy leader clustering: each rule joins the first cluster (in creation
+    order) whose leader is within CLUSTER_DIST, else founds a new one.
+    Returns the cluster index of every rule, identical to _cluster_slow.
+
+    Maps are encoded as a LUT matrix and de-duplicated first (a repeated map
+    always lands in its first copy's cluster).  Unique maps are then taken in
+    blocks: one broadcast against all existing leaders settles every map that
+    matches one; only the rest are checked against leaders founded earlier
+    in the same block.
+    """
+    enc = _encode_maps([r["color_map"] for r in rules])
+    if enc is None:
+        return _cluster_slow(rules)
+    lut, defined = enc
+    if not len(rules):
+        return []
+    rows = np.concatenate([lut, defined.astype(np.int64)], axis=1)
+    _, first, inverse = np.unique(rows, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")          # unique maps by first appearance
+    u_lut, u_def = lut[first[order]], defined[first[order]]
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+
+    u_assign = np.empty(len(order), dtype=np.int64)
+    leaders: List[int] = []                            # unique-map index of each leader
+    for start in range(0, len(order), CLUSTER_BLOCK):
+        block = np.arange(start, min(start + CLUSTER_BLOCK, len(order)))
+        n_old = len(leaders)
+        if n_old:
+            lead = np.asarray(leaders)
+            close = _lut_distances(u_lut[block], u_def[block], u_lut[lead], u_def[lead]) < CLUSTER_DIST
+            hit = close.any(axis=1)
+            first_hit = close.argmax(axis=1)
+        else:
+            hit = np.zeros(len(block), dtype=bool)
+            first_hit = np.zeros(len(block), dtype=np.int64)
+        for j, u in enumerate(block):
+            if hit[j]:
+                u_assign[u] = first_hit[j]
+                continue
+            if len(leaders) > n_old:                   # leaders founded earlier in this block
+                new = np.asarray(leaders[n_old:])
+                d = _lut_distances(u_lut[u:u + 1], u_def[u:u + 1], u_lut[new], u_def[new])[0]
+                near = np.flatnonzero(d < CLUSTER_DIST)
+                if near.size:
+                    u_assign[u] = n_old + near[0]
+                    continue
+            u_assign[u] = len(leaders)
+            leaders.append(u)
+    return u_assign[rank[inverse.ravel()]].tolist()
+
 def _merge_maps(maps: List[Dict[str, int]]) -> Dict[str, int]:
     """Average vote per input color across multiple maps."""
     tally = defaultdict(lambda: defaultdict(int))
     for cmap in maps:
-        for k, v in cmap.items():
+        for k, v in as_colormap(cmap).items():
             tally[k][v] += 1
     merged = {}
     for k, counts in tally.items():
@@ -86,15 +185,10 @@ def build_meta_rules() -> Dict[str, Any]:
 
     # --- group similar maps ---
     clusters: List[List[Dict[str, Any]]] = []
-    for rule in all_rules:
-        placed = False
-        for cluster in clusters:
-            if _color_map_distance(rule["color_map"], cluster[0]["color_map"]) < 0.3:
-                cluster.append(rule)
-                placed = True
-                break
-        if not placed:
-            clusters.append([rule])
+    for rule, c in zip(all_rules, cluster_rules(all_rules)):
+        if c == len(clusters):
+            clusters.append([])
+        clusters[c].append(rule)
 
     # --- merge each cluster ---
     meta_rules = {}
@@ -5,47 +5,45 @@ Boosts rule-mutation pressure when confidence stalls in the 0.6–0.8 band.
 This is chained AFTER normal meta_mutate().
 """
 
-import json
 import random
 from pathlib import Path
 import numpy as np
+from arc_solver.state_store import load_state, save_state
+from arc_solver.step0_colormap import ColorMap, as_colormap
+from arc_solver.ledger_segments import rotate
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 CACHE_PATH = WORK / "cache.json"
 AMPLIFIER_LOG = WORK / "mutation_amp.log"
 
 def _load_cache():
-    if CACHE_PATH.exists():
-        try:
-            with open(CACHE_PATH) as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+    return load_state(CACHE_PATH, {})
 
-def _save_cache(cache: dict):
-    with open(CACHE_PATH, "w") as f:
-        json.dump(cache, f, indent=2)
+def _save_cache(cache: dict, keys=None):
+    save_state(CACHE_PATH, cache, keys)
 
 def _write_log(msg: str):
+    rotate(AMPLIFIER_LOG)   # sealed into mutation_amp.log.d/ past ARC_LEDGER_SEGMENT_MB
     with open(AMPLIFIER_LOG, "a") as f:
         f.write(msg + "\n")
 
 def _mutate_color_map(cmap: dict, intensity: float = 0.25) -> dict:
     """Slightly nudge a color map to explore alternatives."""
-    if not cmap:
+    cm = as_colormap(cmap)
+    if not cm:
         return {}
-    mutated = dict(cmap)
-    keys = list(mutated.keys())
+    lut = np.array(cm.lut)
+    keys = cm.keys()
     # mutate 1..N keys depending on intensity
     n_keys = max(1, int(len(keys) * intensity))
     random.shuffle(keys)
     for k in keys[:n_keys]:
-        base = int(mutated[k])
         # ensure color stays in 0..9
-        mutated[k] = int((base + random.choice([-1, 1])) % 10)
-    return mutated
+        lut[k] = (int(lut[k]) + random.choice([-1, 1])) % 10
+    return ColorMap(lut, cm.mask).to_dict()
 
+@timed("amplify_mutations")
 def amplify_mutations(current_conf: float):
     """
     If confidence is between 0.6 and 0.8 for multiple cycles,
@@ -71,7 +69,7 @@ def amplify_mutations(current_conf: float):
             intensity = 0.35 if 0.6 <= current_conf < 0.7 else 0.25
             new_cmap = _mutate_color_map(cmap, intensity=intensity)
             new_conf = round(float(np.random.uniform(0.6, 0.9)), 3)
-            rec["color_map"] = {int(k): int(v) for k, v in new_cmap.items()}
+            rec["color_map"] = new_cmap
             rec["confidence"] = new_conf
             cache[tid] = rec
             amplified += 1
@@ -4,26 +4,21 @@ step15_meta_decay.py
 Dampens runaway meta weights and rewards genuine improvement.
 """
 
-import json
 from pathlib import Path
 import numpy as np
+from arc_solver.state_store import load_state, save_state
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 META_PATH = WORK / "meta_weights.json"
 
 def _load_meta():
-    if META_PATH.exists():
-        try:
-            with open(META_PATH) as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+    return load_state(META_PATH, {})
 
 def _save_meta(meta: dict):
-    with open(META_PATH, "w") as f:
-        json.dump(meta, f, indent=2)
+    save_state(META_PATH, meta)
 
+@timed("decay_meta_weights")
 def decay_meta_weights(last_conf: float, avg_conf: float):
     """Apply decay or recovery based on progress."""
     meta = _load_meta()
@@ -4,9 +4,11 @@
 # Stores and reuses past high-confidence rules to stabilize learning.
 # ============================================================
 
-import json
 from pathlib import Path
 import numpy as np
+from arc_solver.state_store import load_state, save_state
+from arc_solver.step0_colormap import as_colormap
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 REPLAY_PATH = WORK / "meta_replay.json"
@@ -17,28 +19,22 @@ MAX_MEMORY = 10  # max stored entries
 # ============================================================
 
 def _load_replay() -> list:
-    if REPLAY_PATH.exists():
-        try:
-            with open(REPLAY_PATH) as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
+    return load_state(REPLAY_PATH, [])
 
 def _save_replay(mem: list):
-    with open(REPLAY_PATH, "w") as f:
-        json.dump(mem[-MAX_MEMORY:], f, indent=2)
+    save_state(REPLAY_PATH, mem[-MAX_MEMORY:])
 
 # ============================================================
 # Core Functions
 # ============================================================
 
+@timed("record_replay")
 def record_replay(rule_type: str, color_map: dict, confidence: float):
     """Store a new rule snapshot with confidence."""
     mem = _load_replay()
     entry = {
         "rule_type": rule_type,
-        "color_map": {int(k): int(v) for k, v in color_map.items()},
+        "color_map": as_colormap(color_map).to_dict(),
         "confidence": round(float(confidence), 3)
     }
     mem.append(entry)
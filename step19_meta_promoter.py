@@ -4,27 +4,23 @@
 # Dynamically adjusts threshold based on average replay confidence
 # ============================================================
 
-import json
 import statistics
 from pathlib import Path
+from arc_solver.state_store import load_state, save_state
+from arc_solver.step0_colormap import as_colormap
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 REPLAY_PATH = WORK / "meta_replay.json"
 META_PATH = WORK / "meta_cache.json"
 
 def _load_json(path: Path):
-    if path.exists():
-        try:
-            with open(path) as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+    return load_state(path, {})
 
 def _save_json(path: Path, data: dict):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    save_state(path, data)
 
+@timed("promote_replay_to_meta")
 def promote_replay_to_meta(base_threshold: float = 0.9):
     """Promote replayed rules with adaptive confidence threshold."""
     replay = _load_json(REPLAY_PATH)
@@ -48,7 +44,7 @@ def promote_replay_to_meta(base_threshold: float = 0.9):
             rid = f"meta_promote_{len(meta)+1}"
             meta[rid] = {
                 "type": f"{entry.get('rule_type', 'unknown')}_meta",
-                "color_map": entry.get("color_map", {}),
+                "color_map": as_colormap(entry.get("color_map", {})).to_dict(),
                 "confidence": conf,
                 "source": "adaptive_replay",
             }
@@ -3,68 +3,159 @@ from typing import List, Dict, Tuple
 import numpy as np
 from arc_solver.step0_utils import ensure_integrity
 
-def find_objects(grid: np.ndarray) -> List[Dict]:
+def label_components(grid: np.ndarray, connectivity: int = 4,
+                     by_color: bool = False) -> Tuple[np.ndarray, int]:
     """
-    Find connected non-zero pixel clusters (4-neighbor).
+    Label connected non-zero pixels without a per-pixel Python loop.
+    Rows are split into runs (horizontal segments); runs that touch between
+    adjacent rows are merged by min-label propagation with pointer jumping.
+    Returns (labels, n): labels is -1 on background and 0..n-1 otherwise,
+    numbered in raster order of each component's first pixel.
+    """
+    g = np.asarray(ensure_integrity(grid))
+    h, w = g.shape
+    fg = g != 0
+    if not fg.any():
+        return np.full((h, w), -1, dtype=np.int64), 0
+
+    # --- run-length segments: a run starts where the left neighbour can't extend it
+    joins_left = np.zeros((h, w), dtype=bool)
+    joins_left[:, 1:] = fg[:, 1:] & fg[:, :-1]
+    if by_color:
+        joins_left[:, 1:] &= g[:, 1:] == g[:, :-1]
+    starts = fg & ~joins_left
+    run_of = np.cumsum(starts.ravel()).reshape(h, w) - 1   # run id per pixel (raster ordered)
+    n_runs = int(starts.sum())
+
+    # --- run adjacency between consecutive rows
+    def _links(a_sl, b_sl):
+        ok = fg[a_sl] & fg[b_sl]
+        if by_color:
+            ok &= g[a_sl] == g[b_sl]
+        return run_of[a_sl][ok], run_of[b_sl][ok]
+
+    pairs = [_links((slice(0, -1), slice(None)), (slice(1, None), slice(None)))]
+    if connectivity == 8:
+        pairs.append(_links((slice(0, -1), slice(0, -1)), (slice(1, None), slice(1, None))))
+        pairs.append(_links((slice(0, -1), slice(1, None)), (slice(1, None), slice(0, -1))))
+    a = np.concatenate([p[0] for p in pairs])
+    b = np.concatenate([p[1] for p in pairs])
+    if len(a):
+        codes = np.unique(a * n_runs + b)
+        a, b = codes // n_runs, codes % n_runs
+
+    # --- union: propagate the minimum run id through every link until stable
+    root = np.arange(n_runs)
+    while len(a):
+        m = np.minimum(root[a], root[b])
+        new = root.copy()
+        np.minimum.at(new, a, m)
+        np.minimum.at(new, b, m)
+        new = new[new]                       # pointer jumping
+        while True:
+            nxt = new[new]
+            if np.array_equal(nxt, new):
+                break
+            new = nxt
+        if np.array_equal(new, root):
+            break
+        root = new
+
+    # roots are each component's smallest run id, i.e. its first pixel in raster order
+    uniq, comp_of_run = np.unique(root, return_inverse=True)
+    labels = np.full((h, w), -1, dtype=np.int64)
+    labels[fg] = comp_of_run[run_of[fg]]
+    return labels, len(uniq)
+
+def find_objects(grid: np.ndarray, connectivity: int = 4, by_color: bool = False) -> List[Dict]:
+    """
+    Find connected non-zero pixel clusters (4-neighbor by default; 8 with
+    connectivity=8; by_color=True splits clusters at color changes).
     Adds:
       • bbox
       • centroid (y,x)
       • dominant color
       • rotation / mirror signatures
+    "colors" maps each color to its pixel count, keyed in order of first
+    appearance in raster order.  The pixel-by-pixel flood fill this replaced
+    keyed it in visiting order: the mapping and the dominant color (ties
+    included) are the same, only the key order may differ.
     """
-    g = ensure_integrity(grid)
-    h, w = g.shape
-    visited = np.zeros((h, w), dtype=bool)
-    objects = []
-    obj_id = 0
+    grid = ensure_integrity(grid)
+    labels, n = label_components(grid, connectivity, by_color)
+    g = np.asarray(grid)
+    if n == 0:
+        return []
 
-    for y in range(h):
-        for x in range(w):
-            if g[y, x] == 0 or visited[y, x]:
-                continue
-            stack = [(y, x)]
-            visited[y, x] = True
-            pixels = []
-            color_counts = {}
-            y1 = y2 = y
-            x1 = x2 = x
+    ys, xs = np.nonzero(labels >= 0)                # raster order
+    comp = labels[ys, xs]
+    vals = g[ys, xs].astype(np.int64)
+    counts = np.bincount(comp, minlength=n)
+    cy = (np.bincount(comp, weights=ys, minlength=n) / counts).tolist()
+    cx = (np.bincount(comp, weights=xs, minlength=n) / counts).tolist()
+    y1 = np.full(n, labels.shape[0]); np.minimum.at(y1, comp, ys)
+    x1 = np.full(n, labels.shape[1]); np.minimum.at(x1, comp, xs)
+    y2 = np.zeros(n, dtype=np.int64); np.maximum.at(y2, comp, ys)
+    x2 = np.zeros(n, dtype=np.int64); np.maximum.at(x2, comp, xs)
+    hist = np.bincount(comp * 10 + vals, minlength=n * 10).reshape(n, 10).tolist()
+    # raster index of the first pixel of each (component, color)
+    first = np.full(n * 10, ys.size); np.minimum.at(first, comp * 10 + vals, np.arange(ys.size))
+    first = first.reshape(n, 10).tolist()
+    seed = np.full(n, ys.size); np.minimum.at(seed, comp, np.arange(ys.size))
+    seed_color = vals[seed].tolist()
 
-            while stack:
-                cy, cx = stack.pop()
-                pixels.append((cy, cx))
-                val = int(g[cy, cx])
-                color_counts[val] = color_counts.get(val, 0) + 1
-                y1, y2 = min(y1, cy), max(y2, cy)
-                x1, x2 = min(x1, cx), max(x2, cx)
-                for ny, nx in ((cy-1,cx),(cy+1,cx),(cy,cx-1),(cy,cx+1)):
-                    if 0<=ny<h and 0<=nx<w and not visited[ny,nx] and g[ny,nx]!=0:
-                        visited[ny,nx]=True
-                        stack.append((ny,nx))
+    order = np.argsort(comp, kind="stable")
+    sy, sx = ys[order], xs[order]
+    ends = np.cumsum(counts).tolist()
+    y1, x1, y2, x2 = y1.tolist(), x1.tolist(), y2.tolist(), x2.tolist()
+    legacy = connectivity == 4 and not by_color
 
-            mask = np.zeros((y2-y1+1, x2-x1+1), bool)
-            for py, px in pixels:
-                mask[py-y1, px-x1] = True
-
-            dom_color = max(color_counts, key=color_counts.get)
-            centroid = (
-                float(np.mean([p[0] for p in pixels])),
-                float(np.mean([p[1] for p in pixels]))
-            )
+    objects = []
+    start = 0
+    for i in range(n):
+        oy1, ox1, oy2, ox2 = y1[i], x1[i], y2[i], x2[i]
+        end = ends[i]
+        mask = np.zeros((oy2-oy1+1, ox2-ox1+1), bool)
+        mask[sy[start:end] - oy1, sx[start:end] - ox1] = True
+        start = end
 
-            # rotation/mirror signatures for later matching
-            sig_rot90 = np.rot90(mask)
-            sig_mirror = np.fliplr(mask)
+        # colors in order of first appearance (the seed pixel's color leads)
+        row, fst = hist[i], first[i]
+        present = sorted([c for c in range(10) if row[c]], key=fst.__getitem__)
+        color_counts = {c: row[c] for c in present}
+        top = max(row)
+        if legacy and row[seed_color[i]] != top and sum(v == top for v in row) > 1:
+            # tie decided by flood-fill visiting order: replay it for this object only
+            color_counts = _flood_color_order(g, labels, i, oy1, ox1, oy2, ox2, color_counts)
+        dom_color = max(color_counts, key=color_counts.get)
 
-            objects.append({
-                "id": obj_id,
-                "bbox": (y1, x1, y2+1, x2+1),
-                "mask": mask,
-                "colors": color_counts,
-                "dominant": dom_color,
-                "centroid": centroid,
-                "sig_rot90": sig_rot90,
-                "sig_mirror": sig_mirror,
-            })
-            obj_id += 1
+        objects.append({
+            "id": i,
+            "bbox": (oy1, ox1, oy2+1, ox2+1),
+            "mask": mask,
+            "colors": color_counts,
+            "dominant": dom_color,
+            "centroid": (cy[i], cx[i]),
+            "sig_rot90": mask[:, ::-1].T,   # == np.rot90(mask), without its per-call overhead
+            "sig_mirror": mask[:, ::-1],    # == np.fliplr(mask)
+        })
 
     return objects
+
+def _flood_color_order(g, labels, i, y1, x1, y2, x2, color_counts) -> Dict[int, int]:
+    """Reorder color_counts the way the reference flood fill first visits colors."""
+    sub = labels[y1:y2+1, x1:x2+1] == i
+    h, w = sub.shape
+    sy, sx = np.argwhere(sub)[0]
+    seen = np.zeros((h, w), bool)
+    seen[sy, sx] = True
+    stack = [(int(sy), int(sx))]
+    ordered = {}
+    while stack and len(ordered) < len(color_counts):
+        cy, cx = stack.pop()
+        ordered.setdefault(int(g[y1+cy, x1+cx]), 0)
+        for ny, nx in ((cy-1,cx),(cy+1,cx),(cy,cx-1),(cy,cx+1)):
+            if 0<=ny<h and 0<=nx<w and sub[ny,nx] and not seen[ny,nx]:
+                seen[ny,nx] = True
+                stack.append((ny,nx))
+    return {c: color_counts[c] for c in ordered}
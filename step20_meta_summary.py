@@ -4,27 +4,22 @@
 # Records threshold, promotion count, and replay size over runs
 # ============================================================
 
-import json
 from datetime import datetime
 from pathlib import Path
+from arc_solver.state_store import load_state, save_state
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 SUMMARY_PATH = WORK / "meta_summary.json"
 REPLAY_PATH = WORK / "meta_replay.json"
 
 def _load_json(path: Path):
-    if path.exists():
-        try:
-            with open(path) as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+    return load_state(path, {})
 
 def _save_json(path: Path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    save_state(path, data)
 
+@timed("record_summary")
 def record_summary(threshold: float, promoted: int):
     replay = _load_json(REPLAY_PATH)
     entry = {
@@ -34,13 +29,10 @@ def record_summary(threshold: float, promoted: int):
         "replay_size": len(replay) if isinstance(replay, list) else 0,
     }
 
-    if SUMMARY_PATH.exists():
-        data = _load_json(SUMMARY_PATH)
-        if not isinstance(data, list):
-            data = []
-        data.append(entry)
-    else:
-        data = [entry]
+    data = _load_json(SUMMARY_PATH)
+    if not isinstance(data, list):
+        data = []
+    data.append(entry)
 
     _save_json(SUMMARY_PATH, data)
     print(f"[SUMMARY] Logged promotion summary → {SUMMARY_PATH}")
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
-import json, math, hashlib
+import math
+import numpy as np
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List
+from arc_solver.state_store import load_state, save_state, query_state
+from arc_solver.step0_colormap import ColorMap, stack_luts
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 META_PATH = WORK / "meta_cache.json"
@@ -10,54 +14,37 @@ CACHE_PATH = WORK / "cache.json"
 # ---------------- IO ----------------
 
 def _load_json(path: Path):
-    try:
-        if path.exists():
-            with open(path) as f:
-                return json.load(f)
-    except Exception:
-        pass
-    # default container types
-    return {} if path.suffix == ".json" else {}
-
-def _save_json(path: Path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-
-# ---------------- signatures & distances ----------------
-
-def _norm_cmap(cmap: Dict[Any, Any]) -> Dict[int, int]:
-    """Coerce to {int:int}, drop invalid keys."""
-    out = {}
-    for k, v in (cmap or {}).items():
-        try:
-            out[int(k)] = int(v)
-        except Exception:
-            continue
-    return out
+    return load_state(path, {})
+
+def _save_json(path: Path, data, keys=None):
+    save_state(path, data, keys)
+
+# ---------------- pair bitsets & distances ----------------
 
-def _pairs(cmap: Dict[int, int]) -> List[Tuple[int, int]]:
-    """Sorted (k->v) pairs for stable hashing/compare."""
-    return sorted((int(k), int(v)) for k, v in cmap.items())
+def _pair_bitsets(cmaps: List[ColorMap]) -> np.ndarray:
+    """(N, 2) uint64 bitsets of the maps' (k->v) pairs: bit k*10+v."""
+    luts = stack_luts(cmaps)
+    defined = np.array([cm.defined for cm in cmaps], dtype=bool).reshape(len(cmaps), 10)
+    rows, keys = np.nonzero(defined)
+    bits = np.zeros((len(cmaps), 128), dtype=bool)
+    bits[rows, keys * 10 + luts[rows, keys]] = True
+    return np.packbits(bits, axis=1, bitorder="little").view("<u8")
 
-def _sig_str(cmap: Dict[int,int]) -> str:
-    """Stable signature string for a color map."""
-    p = _pairs(cmap)
-    raw = ";".join(f"{k}->{v}" for k,v in p)
-    # include size to avoid collisions of different sizes with same prefix
-    raw = f"n={len(p)}|" + raw
-    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per row of a (..., W) uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return np.unpackbits(words.view(np.uint8), axis=-1).sum(axis=-1, dtype=np.int64)
 
-def _sig_distance(a: Dict[int,int], b: Dict[int,int]) -> float:
+def _jaccard_row(bits: np.ndarray, i: int) -> np.ndarray:
     """
-    Distance in [0,1] based on Jaccard of mapping pairs.
-      dist = 1 - |A∩B| / |A∪B|
+    Jaccard distance in [0,1] of map i's (k->v) pairs to every map's,
+    1 - |A∩B| / |A∪B| (0.0 when both are empty), by popcount of AND / OR.
     """
-    A = set(_pairs(a))
-    B = set(_pairs(b))
-    if not A and not B: 
-        return 0.0
-    jacc = len(A& B) / float(len(A | B))
-    return 1.0 - jacc
+    inter = _popcount(bits & bits[i])
+    union = _popcount(bits | bits[i])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(union > 0, 1.0 - inter / union, 0.0)
 
 # ---------------- capacity heuristic ----------------
 
@@ -71,7 +58,9 @@ def _auto_cap(n: int) -> int:
 
 # ---------------- main rehearse ----------------
 
-def rehearse_meta(cap: int | str = "auto", diversity: float = 0.33, min_sig_dist: float = 0.35) -> int:
+@timed("rehearse_meta")
+def rehearse_meta(cap: int | str = "auto", diversity: float = 0.33, min_sig_dist: float = 0.35,
+                  pool: int = None) -> int:
     """
     Load top meta rules into solver cache with capacity & signature diversity.
 
@@ -79,37 +68,31 @@ def rehearse_meta(cap: int | str = "auto", diversity: float = 0.33, min_sig_dist
       cap: "auto" or integer count of rules to load.
       diversity: fraction of K we try to make signature-distinct (ceil(diversity*K)).
       min_sig_dist: minimum pairwise signature distance between selected rules.
+      pool: only consider the `pool` highest-confidence meta rules (None = all).
     Returns:
       Number of rules injected into cache.
     """
-    meta = _load_json(META_PATH)
     cache = _load_json(CACHE_PATH)
 
-    # Collect candidates
+    # Collect candidates, ranked by confidence desc by the state backend
     items: List[Dict[str, Any]] = []
-    if isinstance(meta, dict):
-        for rid, rule in meta.items():
-            if not isinstance(rule, dict):
-                continue
-            rtype = str(rule.get("type", ""))
-            if not rtype.endswith("_meta"):
-                continue
-            cmap = _norm_cmap(rule.get("color_map", {}))
-            conf = float(rule.get("confidence", 0.0))
-            items.append({
-                "rid": rid,
-                "type": rtype,               # often "color_map_meta"
-                "color_map": cmap,
-                "confidence": conf,
-                "sig": _sig_str(cmap),
-            })
+    for rid, rule in query_state(META_PATH, by_confidence=True, limit=pool, type_suffix="_meta"):
+        rtype = str(rule.get("type", ""))
+        cmap = ColorMap.from_dict(rule.get("color_map", {}))
+        conf = float(rule.get("confidence", 0.0))
+        items.append({
+            "rid": rid,
+            "type": rtype,               # often "color_map_meta"
+            "color_map": cmap,
+            "confidence": conf,
+            "sig": cmap.key,
+        })
 
     if not items:
         print("[REHEARSE] Meta cache contained no *meta* rules.")
         return 0
 
-    # Sort by confidence desc, dedupe by signature first
-    items.sort(key=lambda x: x["confidence"], reverse=True)
+    # Dedupe by signature first (items are already sorted by confidence)
     seen_sig = set()
     uniq: List[Dict[str,Any]] = []
     for it in items:
@@ -136,25 +119,28 @@ def rehearse_meta(cap: int | str = "auto", diversity: float = 0.33, min_sig_dist
     # Target number of signature-distinct picks
     target_distinct = max(1, min(K, int(math.ceil(diversity * K))))
 
-    # Greedy selection with signature distance constraint
+    # Greedy selection with signature distance constraint.  min_dist[j] is the
+    # distance from candidate j to its nearest selected rule: it is updated
+    # with one popcount row per pick and reused by every relaxation pass, so a
+    # pass only scans for the next candidate with min_dist >= relax.
     selected: List[Dict[str,Any]] = []
-    sigs: List[str] = []
+    sigs: List[int] = []
+    bits = _pair_bitsets([it["color_map"] for it in items])
+    min_dist = np.full(N, np.inf)
 
     # Adaptive relaxation if we can't fill K
     relax = min_sig_dist
     idx = 0
     while len(selected) < K and idx < N:
-        cand = items[idx]
-        ok = True
-        for s in selected:
-            d = _sig_distance(cand["color_map"], s["color_map"])
-            if d < relax:
-                ok = False
-                break
-        if ok:
-            selected.append(cand)
-            sigs.append(cand["sig"])
-        idx += 1
+        ok = np.flatnonzero(min_dist[idx:] >= relax)
+        if ok.size:
+            j = idx + int(ok[0])
+            selected.append(items[j])
+            sigs.append(items[j]["sig"])
+            np.minimum(min_dist, _jaccard_row(bits, j), out=min_dist)
+            idx = j + 1
+        else:
+            idx = N
 
         # If we ran through list and still underfilled: relax and restart pass
         if idx == N and len(selected) < K:
@@ -173,24 +159,29 @@ def rehearse_meta(cap: int | str = "auto", diversity: float = 0.33, min_sig_dist
         selected.extend(pool[:needed])
 
     # Purge old rehearse_* entries
+    touched = set()
     if not isinstance(cache, dict):
         cache = {}
+        touched = None
     else:
         for k in list(cache.keys()):
             if isinstance(k, str) and k.startswith("rehearse_"):
                 del cache[k]
+                touched.add(k)
 
     # Inject selected rules
     for i, r in enumerate(selected, 1):
         tid = f"rehearse_{r['rid']}_{i}"
         cache[tid] = {
             "type": r["type"],                 # e.g., "color_map_meta"
-            "color_map": r["color_map"],
+            "color_map": r["color_map"].to_dict(),
             "confidence": r["confidence"],
             "sig": r["sig"],
         }
+        if touched is not None:
+            touched.add(tid)
 
-    _save_json(CACHE_PATH, cache)
+    _save_json(CACHE_PATH, cache, keys=touched)
 
     # Reporting
     # logical "types" (likely 1) + signature diversity (what we care about)
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
-import json, math, hashlib
+import math
+import numpy as np
 from pathlib import Path
 from collections import Counter
 from typing import Dict, Any, List, Tuple
+from arc_solver.state_store import load_state, save_state
+from arc_solver.step0_colormap import ColorMap, norm_cmap as _norm_cmap, pack_keys
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 META_PATH = WORK / "meta_cache.json"
@@ -10,36 +14,15 @@ REPLAY_PATH = WORK / "replay.json"
 
 # ---------- IO ----------
 def _load_json(path: Path):
-    try:
-        if path.exists():
-            with open(path) as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return {} if path.suffix == ".json" else {}
+    return load_state(path, {})
 
 def _save_json(path: Path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    save_state(path, data)
 
 # ---------- helpers ----------
-def _norm_cmap(cmap: Dict[Any, Any]) -> Dict[int,int]:
-    out = {}
-    for k, v in (cmap or {}).items():
-        try:
-            out[int(k)] = int(v)
-        except Exception:
-            continue
-    return out
-
 def _pairs(cmap: Dict[int,int]) -> List[Tuple[int,int]]:
     return sorted((int(k), int(v)) for k, v in cmap.items())
 
-def _sig_str(cmap: Dict[int,int]) -> str:
-    p = _pairs(cmap)
-    raw = "n=%d|" % len(p) + ";".join(f"{k}->{v}" for k, v in p)
-    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
-
 def _is_bijection(cmap: Dict[int,int]) -> bool:
     vals = list(cmap.values())
     return len(set(vals)) == len(vals)
@@ -64,7 +47,78 @@ def _prune_least_supported(cmap: Dict[int,int], support: Dict[Tuple[int,int], fl
     out.pop(drop_k, None)
     return out
 
+# ---------- batched (LUT matrix) variants ----------
+def _map_key(cmap: Dict[int,int]):
+    """Dedupe key: the ColorMap key for ARC colors, otherwise the sorted pair tuple."""
+    try:
+        return ColorMap.from_dict(cmap, strict=True).key
+    except ValueError:
+        return tuple(_pairs(cmap))
+
+def _lut_keys(lut: np.ndarray) -> np.ndarray:
+    """ColorMap keys of (N,10) LUT rows (-1 = undefined)."""
+    return pack_keys(lut, lut >= 0)
+
+def _encode(cmaps: List[Dict[int,int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(N,10) LUT (-1 = undefined) and (N,10) insertion rank of each key (10 = undefined)."""
+    lut = np.full((len(cmaps), 10), -1, dtype=np.int64)
+    rank = np.full((len(cmaps), 10), 10, dtype=np.int64)
+    for i, cmap in enumerate(cmaps):
+        for r, (k, v) in enumerate(cmap.items()):
+            lut[i, k] = v
+            rank[i, k] = r
+    return lut, rank
+
+def _pair_support(replay_maps: List[Dict[int,int]], replay_confs: List[float]) -> np.ndarray:
+    """(10,10) confidence-weighted support of ARC-color pairs: one bincount over pair indices."""
+    idx, w = [], []
+    for cmap, conf in zip(replay_maps, replay_confs):
+        weight = 1.0 + max(0.0, conf)  # ≥1
+        for k, v in cmap.items():
+            if 0 <= k <= 9 and 0 <= v <= 9:
+                idx.append(k * 10 + v)
+                w.append(weight)
+    return np.bincount(np.asarray(idx, dtype=np.int64), weights=np.asarray(w, dtype=float),
+                       minlength=100).reshape(10, 10)
+
+def _lut_variants(lut: np.ndarray, rank: np.ndarray, support: np.ndarray, max_shifts: int):
+    """
+    Keys and validity of every variant of every row, slots = [invert, shift1..S, prune1]:
+      invert — bijective rows, scattered into the inverse LUT;
+      shift  — modular add on defined columns;
+      prune  — least-supported column masked out (ties: earliest inserted key).
+    Returns (keys (N,S+2), valid (N,S+2), dropped key per row).
+    """
+    n = len(lut)
+    defined = lut >= 0
+    n_def = defined.sum(axis=1)
+    rows = np.arange(n)[:, None]
+    keys = np.zeros((n, max_shifts + 2), dtype=np.int64)
+    valid = np.zeros((n, max_shifts + 2), dtype=bool)
+
+    # invert: every defined value used once
+    vals = np.where(defined, lut, 10)      # undefined columns land in a spare slot
+    hits = np.bincount((rows * 11 + vals).ravel(), minlength=n * 11).reshape(n, 11)
+    valid[:, 0] = (hits[:, :10] <= 1).all(axis=1)
+    inv = np.full((n, 11), -1, dtype=np.int64)
+    inv[np.broadcast_to(rows, lut.shape), vals] = np.where(defined, np.arange(10), -1)
+    keys[:, 0] = _lut_keys(inv[:, :10])
+
+    for s in range(1, max_shifts + 1):
+        keys[:, s] = _lut_keys(np.where(defined, (lut + s) % 10, -1))
+        valid[:, s] = True
+
+    sup = np.where(defined, support[np.arange(10), np.clip(lut, 0, 9)], np.inf)
+    weakest = (sup == sup.min(axis=1, keepdims=True)) & defined
+    drop = np.where(weakest, rank, 10).argmin(axis=1)
+    pruned = lut.copy()
+    pruned[np.arange(n), drop] = -1
+    keys[:, -1] = _lut_keys(pruned)
+    valid[:, -1] = n_def > 1
+    return keys, valid, drop
+
 # ---------- core ----------
+@timed("diversify_meta")
 def diversify_meta(target: int = 24, min_new: int = 8, max_shifts: int = 2) -> int:
     """
     Synthesize distinct color_map_meta entries from replay+meta to raise signature diversity.
@@ -95,8 +149,9 @@ def diversify_meta(target: int = 24, min_new: int = 8, max_shifts: int = 2) -> i
                 base_maps.append({"rid": rid, "conf": float(rule.get("confidence", 0.7)), "cmap": cmap})
 
     # from replay (as candidates)
-    for i, entry in enumerate(replay):
-        cmap = _norm_cmap(entry.get("color_map", {}))
+    replay_maps = [_norm_cmap(entry.get("color_map", {})) for entry in replay]
+    replay_confs = [float(entry.get("confidence", 0.0)) for entry in replay]
+    for i, (cmap, entry) in enumerate(zip(replay_maps, replay)):
         if cmap:
             base_maps.append({"rid": f"replay_{i}", "conf": float(entry.get("confidence", 0.0)), "cmap": cmap})
 
@@ -104,70 +159,92 @@ def diversify_meta(target: int = 24, min_new: int = 8, max_shifts: int = 2) -> i
         print("[DIVERSIFY] No base maps available.")
         return 0
 
-    # compute support for pairs from replay (confidence-weighted)
-    support = Counter()
-    for entry in replay:
-        conf = float(entry.get("confidence", 0.0))
-        weight = 1.0 + max(0.0, conf)  # ≥1
-        cmap = _norm_cmap(entry.get("color_map", {}))
-        for k, v in cmap.items():
-            support[(int(k), int(v))] += weight
-
-    # set of existing signatures to avoid dup
-    existing_sigs = set()
+    # keys of existing signatures to avoid dup
+    existing = set()
     for rule in meta.values():
         if isinstance(rule, dict) and "color_map" in rule:
-            existing_sigs.add(_sig_str(_norm_cmap(rule["color_map"])))
-
-    # candidate generation
-    generated: List[Dict[str, Any]] = []
-    for bm in base_maps:
-        base = bm["cmap"]
-        sig_base = _sig_str(base)
-        # 1) inverse if bijection
-        inv = _invert(base)
-        if inv:
-            sig = _sig_str(inv)
-            if sig not in existing_sigs:
-                generated.append({"cmap": inv, "conf": bm["conf"] * 0.98, "src": f"{bm['rid']}:invert"})
-
-        # 2) shifts
-        for s in range(1, max_shifts + 1):
-            sh = _shift(base, s)
-            sig = _sig_str(sh)
-            if sig not in existing_sigs:
-                generated.append({"cmap": sh, "conf": bm["conf"] * (0.97 - 0.01*(s-1)), "src": f"{bm['rid']}:shift{s}"})
-
-        # 3) prune weakest pair (if any support known)
-        pr = _prune_least_supported(base, support)
-        if pr:
-            sig = _sig_str(pr)
-            if sig not in existing_sigs:
-                generated.append({"cmap": pr, "conf": max(0.6, bm["conf"] * 0.95), "src": f"{bm['rid']}:prune1"})
-
-    if not generated:
+            existing.add(_map_key(_norm_cmap(rule["color_map"])))
+
+    # candidate generation: one row of variant slots [invert, shift1..S, prune1] per base
+    S = max_shifts
+    n = len(base_maps)
+    confs = np.array([bm["conf"] for bm in base_maps])
+    cand_conf = np.empty((n, S + 2))
+    cand_conf[:, 0] = confs * 0.98
+    for s in range(1, S + 1):
+        cand_conf[:, s] = confs * (0.97 - 0.01*(s-1))
+    cand_conf[:, -1] = np.maximum(0.6, confs * 0.95)
+    cand_key: List[Any] = [None] * (n * (S + 2))
+    cand_ok = np.zeros((n, S + 2), dtype=bool)
+    dropped: Dict[int, int] = {}           # base -> key removed by its prune variant
+    dict_maps: Dict[int, Dict[int,int]] = {}
+
+    arc = np.array([isinstance(_map_key(bm["cmap"]), int) for bm in base_maps])
+    if arc.any():
+        rows = np.flatnonzero(arc)
+        lut, rank = _encode([base_maps[i]["cmap"] for i in rows])
+        keys, valid, drop = _lut_variants(lut, rank, _pair_support(replay_maps, replay_confs), S)
+        new = valid & ~np.isin(keys, np.fromiter((k for k in existing if isinstance(k, int)), dtype=np.int64))
+        cand_ok[rows] = new
+        for r, i in enumerate(rows.tolist()):
+            for slot in np.flatnonzero(new[r]).tolist():
+                cand_key[i * (S + 2) + slot] = int(keys[r, slot])
+            dropped[i] = int(drop[r])
+    if not arc.all():
+        # maps with keys/values outside 0..9: the dict path
+        support = Counter()
+        for cmap, conf in zip(replay_maps, replay_confs):
+            for k, v in cmap.items():
+                support[(int(k), int(v))] += 1.0 + max(0.0, conf)
+        for i in np.flatnonzero(~arc).tolist():
+            base = base_maps[i]["cmap"]
+            variants = [_invert(base)] + [_shift(base, s) for s in range(1, S + 1)] + \
+                       [_prune_least_supported(base, support)]
+            for slot, var in enumerate(variants):
+                if var:
+                    key = _map_key(var)
+                    if key not in existing:
+                        cand_ok[i, slot] = True
+                        cand_key[i * (S + 2) + slot] = key
+                        dict_maps[i * (S + 2) + slot] = var
+
+    if not cand_ok.any():
         print("[DIVERSIFY] No new variants synthesized.")
         return 0
 
-    # rank by confidence (variants carry slightly decayed conf)
-    generated.sort(key=lambda x: x["conf"], reverse=True)
+    # rank by confidence (variants carry slightly decayed conf); stable like list.sort
+    flat = np.flatnonzero(cand_ok.ravel())
+    flat = flat[np.argsort(-cand_conf.ravel()[flat], kind="stable")]
+
+    def _materialize(i: int, slot: int) -> Dict[int,int]:
+        base = base_maps[i]["cmap"]
+        if slot == 0:
+            return _invert(base)
+        if slot <= S:
+            return _shift(base, slot)
+        out = dict(base)
+        out.pop(dropped[i], None)
+        return out
 
     # add until we hit min_new or target total size, skipping duplicate signatures
     added = 0
-    for cand in generated:
+    for f in flat.tolist():
         if len(meta) >= max(target, len(meta) + min_new):  # safety
             break
-        sig = _sig_str(cand["cmap"])
-        if sig in existing_sigs:
+        i, slot = divmod(f, S + 2)
+        key = cand_key[f]
+        if key in existing:
             continue
+        cmap = dict_maps[f] if f in dict_maps else _materialize(i, slot)
+        src = "invert" if slot == 0 else f"shift{slot}" if slot <= S else "prune1"
         rid = f"meta_div_{len(meta)+1}"
         meta[rid] = {
             "type": "color_map_meta",
-            "color_map": cand["cmap"],
-            "confidence": round(float(cand["conf"]), 3),
-            "source": f"diversify({cand['src']})",
+            "color_map": cmap,
+            "confidence": round(float(cand_conf[i, slot]), 3),
+            "source": f"diversify({base_maps[i]['rid']}:{src})",
         }
-        existing_sigs.add(sig)
+        existing.add(key)
         added += 1
         if added >= min_new:
             # we reached minimum; continue a bit if total < target
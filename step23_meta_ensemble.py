@@ -1,52 +1,31 @@
 #!/usr/bin/env python3
-import json
+import heapq
+import hashlib
 import numpy as np
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Callable
 
 from arc_solver.step5_transforms import rotate90, flip_x, flip_y
+from arc_solver.state_store import load_state, query_state
+from arc_solver.step0_features import features
+from arc_solver.step0_colormap import ColorMap, stack_luts
+from arc_solver.instrument import timed, stage
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 CACHE_PATH  = WORK / "cache.json"
 META_PATH   = WORK / "meta_cache.json"
 REPLAY_PATH = WORK / "replay.json"
+PRUNE_CHUNK = 16   # candidates scored per branch-and-bound round
+
+# counters of work skipped by the branch-and-bound scorer (see get_prune_stats)
+PRUNE_STATS = {"variants": 0, "shape_zero": 0, "bound_pruned": 0,
+               "early_stopped": 0, "pair_evals": 0, "pair_evals_skipped": 0}
 
 # ---------------- IO ----------------
 def _load_json(path: Path):
-    try:
-        if path.exists():
-            with open(path) as f:
-                return json.load(f)
-    except Exception:
-        pass
-    if path == CACHE_PATH:
-        return {}
-    if path == META_PATH:
-        return {}
     if path == REPLAY_PATH:
-        return []
-    return {}
-
-# ---------------- color-map utils ----------------
-def _norm_cmap(cmap: Dict[Any, Any]) -> Dict[int, int]:
-    out = {}
-    for k, v in (cmap or {}).items():
-        try:
-            out[int(k)] = int(v)
-        except Exception:
-            continue
-    return out
-
-def _cmap_sig(cmap: Dict[int,int]) -> str:
-    items = sorted((int(k), int(v)) for k, v in (cmap or {}).items())
-    return ";".join(f"{k}->{v}" for k, v in items)
-
-def _apply_cmap(grid: np.ndarray, cmap: Dict[int,int]) -> np.ndarray:
-    lut = np.arange(10, dtype=np.int16)
-    for k, v in cmap.items():
-        if 0 <= k <= 9 and 0 <= v <= 9:
-            lut[k] = v
-    return lut[grid]
+        return load_state(path, [])
+    return load_state(path, {})
 
 # ---------------- transforms as (forward, inverse) ----------------
 def _transforms() -> List[Tuple[str, Callable[[np.ndarray], np.ndarray], Callable[[np.ndarray], np.ndarray]]]:
@@ -60,11 +39,65 @@ def _transforms() -> List[Tuple[str, Callable[[np.ndarray], np.ndarray], Callabl
         ("flip_y",  lambda g: flip_y(g),        lambda g: flip_y(g)),  # self-inverse
     ]
 
+# ---------------- per-task prepared grids ----------------
+class PreparedTask:
+    """
+    Grids of one task converted once, with every transform image precomputed.
+    For transform t and train pair p: x[t][p] / y[t][p] are fwd(input) / fwd(output)
+    flattened (None when their shapes differ) and opt[t][p] is the best accuracy
+    any color map can reach on the pair: sum over input colors of the largest
+    cell in the input/output joint color histogram.  For test sample s, back[t][s] is
+    inv(fwd(input)): since a color map acts per pixel, inv(cmap(fwd(x))) equals
+    cmap(inv(fwd(x))), so a prediction is a single LUT gather on back[t][s].
+    """
+    __slots__ = ("task_id", "tnames", "n_pairs", "x", "y", "sizes", "opt", "back")
+
+    def __init__(self, task: Dict[str, Any]):
+        self.task_id = task.get("id", "unknown")
+        pairs = task.get("train", [])
+        tests = task.get("test", [])
+        ins  = [features(p["input"]) for p in pairs]
+        outs = [features(p["output"]) for p in pairs]
+        tins = [features(t["input"]) for t in tests]
+        self.n_pairs = len(pairs)
+        self.tnames, self.x, self.y, self.sizes, self.opt, self.back = [], [], [], [], [], []
+        for tname, fwd, inv in _transforms():
+            xs, ys, opts = [], [], []
+            for inp, out in zip(ins, outs):
+                x_t, y_t = _image(inp, tname, fwd), _image(out, tname, fwd)
+                ok = x_t.shape == y_t.shape
+                xs.append(x_t.ravel() if ok else None)
+                ys.append(y_t.ravel() if ok else None)
+                if ok:
+                    joint = np.bincount(xs[-1] * np.intp(10) + ys[-1], minlength=100).reshape(10, 10)
+                    opts.append(joint.max(axis=1).sum() / out.array.size)
+                else:
+                    opts.append(0.0)
+            self.tnames.append(tname)
+            self.x.append(xs)
+            self.y.append(ys)
+            self.sizes.append([o.array.size for o in outs])
+            self.opt.append(opts)
+            self.back.append([inv(_image(t, tname, fwd)) for t in tins])
+
+def _image(feat, tname: str, fwd) -> np.ndarray:
+    """fwd-transform image of a grid (a uint8 view), memoized in the feature store."""
+    return feat.derive(("image", tname), lambda a: np.asarray(fwd(a)))
+
+def prepare_task(task: Dict[str, Any]) -> PreparedTask:
+    return PreparedTask(task)
+
 # ---------------- candidate gathering ----------------
-def collect_candidate_maps(task_id: str) -> List[Dict[str, Any]]:
+@timed("collect_candidates")
+def collect_candidate_maps(task_id: str, cache: Dict[str, Any] = None,
+                           meta_limit: int = None) -> List[Dict[str, Any]]:
+    """
+    Gather candidate color maps: the task's cached rule, rehearse_* entries,
+    *_meta rules (only the top `meta_limit` by confidence if given) and replay.
+    """
     cands: List[Dict[str, Any]] = []
-    cache  = _load_json(CACHE_PATH)
-    meta   = _load_json(META_PATH)
+    if cache is None:
+        cache = _load_json(CACHE_PATH)
     replay = _load_json(REPLAY_PATH)
 
     # task-specific cached rule
@@ -73,7 +106,7 @@ def collect_candidate_maps(task_id: str) -> List[Dict[str, Any]]:
         if isinstance(rule, dict) and "color_map" in rule:
             cands.append({
                 "type": rule.get("type", "cache"),
-                "color_map": _norm_cmap(rule.get("color_map", {})),
+                "color_map": ColorMap.from_dict(rule.get("color_map", {})),
                 "confidence": float(rule.get("confidence", 0.6)),
                 "source": f"cache:{task_id[:8]}",
             })
@@ -82,7 +115,7 @@ def collect_candidate_maps(task_id: str) -> List[Dict[str, Any]]:
     if isinstance(cache, dict):
         for k, rule in cache.items():
             if isinstance(k, str) and k.startswith("rehearse_") and isinstance(rule, dict):
-                cm = _norm_cmap(rule.get("color_map", {}))
+                cm = ColorMap.from_dict(rule.get("color_map", {}))
                 if cm:
                     cands.append({
                         "type": rule.get("type", "meta"),
@@ -91,23 +124,22 @@ def collect_candidate_maps(task_id: str) -> List[Dict[str, Any]]:
                         "source": f"cache:{k}",
                     })
 
-    # meta rules
-    if isinstance(meta, dict):
-        for rid, rule in meta.items():
-            if isinstance(rule, dict) and str(rule.get("type","")).endswith("_meta"):
-                cm = _norm_cmap(rule.get("color_map", {}))
-                if cm:
-                    cands.append({
-                        "type": rule.get("type", "meta"),
-                        "color_map": cm,
-                        "confidence": float(rule.get("confidence", 0.7)),
-                        "source": f"meta:{rid}",
-                    })
+    # meta rules (filtered/ranked by the state backend)
+    ranked = meta_limit is not None
+    for rid, rule in query_state(META_PATH, by_confidence=ranked, limit=meta_limit, type_suffix="_meta"):
+        cm = ColorMap.from_dict(rule.get("color_map", {}))
+        if cm:
+            cands.append({
+                "type": rule.get("type", "meta"),
+                "color_map": cm,
+                "confidence": float(rule.get("confidence", 0.7)),
+                "source": f"meta:{rid}",
+            })
 
     # replay memory
     if isinstance(replay, list):
         for i, entry in enumerate(replay):
-            cm = _norm_cmap(entry.get("color_map", {}))
+            cm = ColorMap.from_dict(entry.get("color_map", {}))
             if cm:
                 cands.append({
                     "type": entry.get("rule_type", "replay"),
@@ -117,57 +149,147 @@ def collect_candidate_maps(task_id: str) -> List[Dict[str, Any]]:
                 })
 
     # identity fallback
-    ident = {i: i for i in range(10)}
-    cands.append({"type":"identity","color_map":ident,"confidence":0.5,"source":"fallback:identity"})
+    cands.append({"type":"identity","color_map":ColorMap.identity(),"confidence":0.5,"source":"fallback:identity"})
 
-    # dedupe by signature, keep highest conf
-    best_by_sig: Dict[str, Dict[str, Any]] = {}
+    # dedupe by color map (ColorMap keys), keep highest conf
+    best_by_map: Dict[ColorMap, Dict[str, Any]] = {}
     for c in cands:
-        sig = _cmap_sig(c["color_map"])
-        if sig not in best_by_sig or c["confidence"] > best_by_sig[sig]["confidence"]:
-            best_by_sig[sig] = c
-    return list(best_by_sig.values())
-
-# ---------------- scoring (supervised on train pairs) ----------------
-def _score_variant_on_pairs(pairs: List[Dict[str, Any]],
-                            cmap: Dict[int,int],
-                            tname: str,
-                            fwd, inv) -> float:
-    if not pairs:
-        return 0.5
-    scores = []
-    for p in pairs:
-        inp = np.array(p["input"], dtype=np.int16)
-        out = np.array(p["output"], dtype=np.int16)
-        # Align with ground truth: inv(fwd(inp) → cmap → pred_t) should match out
-        x_t   = fwd(inp)
-        y_t   = _apply_cmap(x_t, cmap)
-        pred  = inv(y_t)
-        if pred.shape != out.shape:
-            # guardrail: mismatched shapes get a low score rather than crash
-            scores.append(0.0)
-        else:
-            acc = float(np.mean(pred == out))
-            scores.append(acc)
-    return float(np.mean(scores)) if scores else 0.5
+        cm = c["color_map"]
+        if cm not in best_by_map or c["confidence"] > best_by_map[cm]["confidence"]:
+            best_by_map[cm] = c
+    return list(best_by_map.values())
+
+def candidate_fingerprint(cands: List[Dict[str, Any]]) -> str:
+    """
+    Hash of everything ensemble_predict's result depends on in a candidate
+    pool: each map's key and confidence, in pool order (ties rank by it).
+    """
+    raw = "|".join(f"{c['color_map'].key}@{c['confidence']!r}" for c in cands)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+# ---------------- batched scoring (all candidates × transforms at once) ----------------
+def _score_candidates_pruned(prep: PreparedTask, cmaps: List[ColorMap],
+                             topk: int, order: List[int] = None) -> np.ndarray:
+    """
+    (C, T) matrix of supervised scores: entry [c, t] is the mean pixel accuracy
+    over the train pairs of inv(fwd(input) → cmaps[c]) against the output under
+    the t-th transform (0.0 for a pair whose shapes differ, 0.5 with no pairs).
+    Comparison happens in transformed space: inv(lut[fwd(x)]) == y  <=>
+    lut[fwd(x)] == fwd(y), since every transform is a pure pixel permutation.
+
+    Scoring is branch-and-bound: scores are exact only for the variants that
+    can reach the top `topk`; the others get -inf.
+
+      • transforms with no shape-compatible pair score exactly 0.0 untouched;
+      • a transform whose optimistic bound (mean of per-pair optima) is below
+        the current k-th best exact score is skipped for the whole chunk;
+      • a candidate is dropped mid-scoring once its scored pairs plus the
+        optima of its remaining pairs can no longer beat the k-th best.
+
+    Pruning is strict (bound < k-th best), so the top-k ranking, including
+    tie order, is identical to scoring everything.  `order` sets the order in
+    which candidates are visited (good ones first tighten the bound sooner).
+    """
+    C, T, P = len(cmaps), len(prep.tnames), prep.n_pairs
+    if not P:
+        return np.full((C, T), 0.5)
+    eps = 1e-9
+    k = max(1, topk)
+    luts = stack_luts(cmaps)
+    scores = np.full((C, T), -np.inf)
+    best: List[float] = []                      # min-heap of the k best exact scores
+    order = np.arange(C) if order is None else np.asarray(order)
+    compatible = [any(x is not None for x in prep.x[ti]) for ti in range(T)]
+    bound_t = [sum(prep.opt[ti]) / P for ti in range(T)]
+    # remaining[ti][j] = sum of per-pair optima for pairs j..P-1
+    remaining = [np.concatenate([np.cumsum(prep.opt[ti][::-1])[::-1], [0.0]]) for ti in range(T)]
+
+    def _push(vals):
+        for v in vals:
+            if len(best) < k:
+                heapq.heappush(best, v)
+            elif v > best[0]:
+                heapq.heapreplace(best, v)
+
+    PRUNE_STATS["variants"] += C * T
+    for start in range(0, C, PRUNE_CHUNK):
+        chunk = order[start:start + PRUNE_CHUNK]
+        for ti in range(T):
+            thr = best[0] if len(best) == k else -np.inf
+            if not compatible[ti]:
+                scores[chunk, ti] = 0.0
+                PRUNE_STATS["shape_zero"] += len(chunk)
+                _push([0.0] * len(chunk))
+                continue
+            if bound_t[ti] < thr - eps:
+                PRUNE_STATS["bound_pruned"] += len(chunk)
+                PRUNE_STATS["pair_evals_skipped"] += len(chunk) * P
+                continue
+            alive = chunk
+            acc = np.zeros((len(chunk), P))
+            rows = np.arange(len(chunk))
+            for pi in range(P):
+                x_t, y_t = prep.x[ti][pi], prep.y[ti][pi]
+                if x_t is not None:
+                    hits = (luts[alive][:, x_t] == y_t).sum(axis=1)
+                    acc[rows, pi] = hits / prep.sizes[ti][pi]
+                    PRUNE_STATS["pair_evals"] += len(alive)
+                if thr > -np.inf and pi + 1 < P:
+                    bound = (acc[rows, :pi + 1].sum(axis=1) + remaining[ti][pi + 1]) / P
+                    keep = bound >= thr - eps
+                    if not keep.all():
+                        dropped = int((~keep).sum())
+                        PRUNE_STATS["early_stopped"] += dropped
+                        PRUNE_STATS["pair_evals_skipped"] += dropped * (P - pi - 1)
+                        alive, rows = alive[keep], rows[keep]
+                        if not len(alive):
+                            break
+            if len(alive):
+                final = acc[rows].mean(axis=1)
+                scores[alive, ti] = final
+                _push(final.tolist())
+    return scores
+
+def get_prune_stats() -> Dict[str, int]:
+    """Snapshot of the branch-and-bound counters (cumulative for this process)."""
+    return dict(PRUNE_STATS)
+
+def reset_prune_stats():
+    for k in PRUNE_STATS:
+        PRUNE_STATS[k] = 0
 
 # ---------------- public API ----------------
-def ensemble_predict(task: Dict[str, Any], topk: int = 2) -> Tuple[List[List[List[int]]], float]:
+def ensemble_predict(task: Dict[str, Any], topk: int = 2,
+                     cache: Dict[str, Any] = None,
+                     meta_limit: int = None,
+                     cands: List[Dict[str, Any]] = None, return_scores: bool = False):
+    """
+    (predictions, mean confidence) of the top-k (cmap × transform) variants;
+    the confidence is rounded to 3 decimals.  With return_scores the unrounded
+    train scores of those variants are returned as a third element.
+    """
     task_id = task.get("id", "unknown")
-    train_pairs = task.get("train", [])
     tests = task.get("test", [])
 
-    cands = collect_candidate_maps(task_id)
+    # caller may pass an already-loaded (possibly not yet persisted) cache,
+    # or the candidate pool itself
+    if cands is None:
+        cands = collect_candidate_maps(task_id, cache=cache, meta_limit=meta_limit)
     if not cands:
-        return [], 0.0
+        return ([], 0.0, []) if return_scores else ([], 0.0)
 
-    # Build (cmap × transform) variants and score on training pairs
-    variants: List[Tuple[float, Dict[str, Any], str, Callable, Callable]] = []
-    for c in cands:
-        cm = c["color_map"]
-        for tname, fwd, inv in _transforms():
-            s = _score_variant_on_pairs(train_pairs, cm, tname, fwd, inv)
-            variants.append((s, c, tname, fwd, inv))
+    # Build (cmap × transform) variants and score them on training pairs in one batch
+    with stage("prepare"):
+        prep = prepare_task(task)
+    # visit confident candidates first so the top-k bound tightens early
+    order = sorted(range(len(cands)), key=lambda i: cands[i]["confidence"], reverse=True)
+    with stage("score"):
+        scores = _score_candidates_pruned(prep, [c["color_map"] for c in cands], topk, order)
+    variants: List[Tuple[float, Dict[str, Any], str, int]] = []
+    for ci, c in enumerate(cands):
+        for ti, tname in enumerate(prep.tnames):
+            if scores[ci, ti] > -np.inf:        # -inf: provably outside the top-k
+                variants.append((float(scores[ci, ti]), c, tname, ti))
 
     # rank by supervised score
     variants.sort(key=lambda x: x[0], reverse=True)
@@ -177,20 +299,19 @@ def ensemble_predict(task: Dict[str, Any], topk: int = 2) -> Tuple[List[List[Lis
     mean_conf = float(np.mean([s for s, *_ in top])) if top else 0.0
     mean_conf = round(mean_conf, 3)
 
-    # predict tests using the same fwd→cmap→inv pipeline
+    # predict tests: fwd→cmap→inv, i.e. the cmap applied to the precomputed inv(fwd(x))
     preds_all: List[List[List[int]]] = []
-    for sample in tests:
-        inp = np.array(sample["input"], dtype=np.int16)
+    for si in range(len(tests)):
         outs: List[List[int]] = []
-        for s, c, tname, fwd, inv in top:
-            x_t   = fwd(inp)
-            y_t   = _apply_cmap(x_t, c["color_map"])
-            pred  = inv(y_t)
+        for s, c, tname, ti in top:
+            pred  = c["color_map"].apply(prep.back[ti][si])
             outs.append(pred.tolist())
         while len(outs) < 2:
             outs.append(outs[0])
         preds_all.append(outs)
 
+    if return_scores:
+        return preds_all, mean_conf, [s for s, *_ in top]
     return preds_all, mean_conf
 
 if __name__ == "__main__":
@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 import json
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Dict, Iterable, List, Tuple, Any
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
-MERGED_PATH = WORK / "merged_dataset.json"
 
 def _is_rect_grid(g: Any) -> bool:
     if not isinstance(g, list) or not g:
@@ -24,23 +24,18 @@ def _vals_ok(g: List[List[int]]) -> bool:
     except Exception:
         return False
 
-def _load_merged() -> Dict[str, Any]:
-    with open(MERGED_PATH) as f:
-        return json.load(f)
+def _load_merged() -> Iterable[Dict[str, Any]]:
+    from arc_solver.fetch_arc_datasets import stream_tasks
+    return stream_tasks()
 
-def validate(results: Dict[str, Any], merged: Dict[str, Any]) -> List[str]:
-    issues: List[str] = []
-    tasks = merged if isinstance(merged, list) else merged.get("tasks", merged)
-
-    # tasks could be list or dict keyed by id; normalize into list of items with id+test
-    norm = []
-    if isinstance(tasks, list):
-        norm = tasks
-    elif isinstance(tasks, dict):
-        for v in tasks.values():
-            norm.append(v)
+def _iter_tasks(merged) -> Iterable[Dict[str, Any]]:
+    """Tasks of a merged dataset: a list, {"tasks": ...}, a dict keyed by id, or any re-iterable stream."""
+    tasks = merged.get("tasks", merged) if isinstance(merged, dict) else merged
+    return tasks.values() if isinstance(tasks, dict) else tasks
 
-    for t in norm:
+def validate(results: Dict[str, Any], merged: Iterable[Dict[str, Any]]) -> List[str]:
+    issues: List[str] = []
+    for t in _iter_tasks(merged):
         tid = t.get("id", "unknown")
         tests = t.get("test", [])
         # Must exist
@@ -69,21 +64,15 @@ def validate(results: Dict[str, Any], merged: Dict[str, Any]) -> List[str]:
                     issues.append(f"{tid}[{i}][{a_idx}] contains non-int or out-of-range values")
     return issues
 
-def validate_and_fix(results: Dict[str, Any], merged: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
-    """Best-effort fixer: ensures 2 attempts per test by duplicating first; drops invalid items."""
+@timed("validate_and_fix")
+def validate_and_fix(results: Dict[str, Any], merged: Iterable[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Best-effort fixer: ensures 2 attempts per test by duplicating first; drops invalid items.
+    `merged` is iterated twice (fix, then validate), so pass a list or a re-iterable stream.
+    """
     issues = []
-    tasks = merged if isinstance(merged, list) else merged.get("tasks", merged)
-
-    # Normalize task list
-    norm = []
-    if isinstance(tasks, list):
-        norm = tasks
-    elif isinstance(tasks, dict):
-        for v in tasks.values():
-            norm.append(v)
-
     fixed = dict(results)
-    for t in norm:
+    for t in _iter_tasks(merged):
         tid = t.get("id", "unknown")
         tests = t.get("test", [])
         if tid not in fixed:
@@ -4,10 +4,13 @@
 # Integrates color_map learning + structural generalization (step17)
 # ============================================================
 
-import json
 import numpy as np
 from pathlib import Path
 from arc_solver.step17_structural_generalizer import detect_structure
+from arc_solver.state_store import load_state
+from arc_solver.step0_features import grid_array
+from arc_solver.step0_colormap import ColorMap, as_colormap
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 META_PATH = WORK / "meta_cache.json"
@@ -17,32 +20,22 @@ META_PATH = WORK / "meta_cache.json"
 # ============================================================
 
 def _load_meta() -> dict:
-    if META_PATH.exists():
-        try:
-            with open(META_PATH) as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+    return load_state(META_PATH, {})
 
-def _blend_color_maps(base_map: dict, meta_map: dict) -> dict:
+def _blend_color_maps(base_map: ColorMap, meta_map: ColorMap) -> ColorMap:
     """Average meta color map with base to stabilize learning."""
     if not meta_map:
         return base_map
-    blended = dict(base_map)
-    for k, v in meta_map.items():
-        k = int(k)
-        v = int(v)
-        if k in blended:
-            blended[k] = int(round((blended[k] + v) / 2))
-        else:
-            blended[k] = v
-    return blended
+    avg = np.round((base_map.lut.astype(np.int64) + meta_map.lut) / 2)
+    both = base_map.defined & meta_map.defined
+    lut = np.where(both, avg, np.where(meta_map.defined, meta_map.lut, base_map.lut))
+    return ColorMap(lut, base_map.mask | meta_map.mask)
 
 # ============================================================
 # Learning Core
 # ============================================================
 
+@timed("learn")
 def learn_from_pairs(pairs: list) -> dict:
     """
     Derive a transformation rule (color_map + structure).
@@ -50,8 +43,8 @@ def learn_from_pairs(pairs: list) -> dict:
     """
     X, Y = [], []
     for p in pairs:
-        inp = np.array(p["input"], dtype=int)
-        out = np.array(p["output"], dtype=int)
+        inp = grid_array(p["input"])
+        out = grid_array(p["output"])
 
         # --- Structural Generalization ---
         inp = detect_structure(inp, out)
@@ -59,30 +52,24 @@ def learn_from_pairs(pairs: list) -> dict:
         X.append(inp)
         Y.append(out)
 
-    all_colors = set(np.unique(np.concatenate([x.flatten() for x in X])))
-    color_map = {}
-
-    for c in all_colors:
-        outs = []
-        for x, y in zip(X, Y):
-            mask = x == c
-            if np.any(mask):
-                outs.extend(list(y[mask]))
-        if outs:
-            color_map[int(c)] = int(np.bincount(outs).argmax())
+    # majority output color per input color, from one joint histogram
+    xs = np.concatenate([np.asarray(x).ravel() for x in X])
+    ys = np.concatenate([np.asarray(y).ravel() for y in Y])
+    joint = np.bincount(xs * np.intp(10) + ys, minlength=100).reshape(10, 10)
+    color_map = ColorMap.from_lut(joint.argmax(axis=1), joint.any(axis=1))
 
     # --- Meta Rule Integration ---
     meta_rules = _load_meta()
     if meta_rules:
         for _, meta in meta_rules.items():
             if meta.get("type") == "color_map_meta":
-                color_map = _blend_color_maps(color_map, meta.get("color_map", {}))
+                color_map = _blend_color_maps(color_map, as_colormap(meta.get("color_map", {})))
                 print(f"[META-LINK] Reinforced with meta rule {meta.get('color_map')}")
 
     conf = round(float(np.random.uniform(0.6, 0.95)), 3)
     rule = {
         "type": "color_map",
-        "color_map": color_map,
+        "color_map": color_map.to_dict(),
         "confidence": conf
     }
     return {"best_rule": rule}
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-import json, numpy as np
+import numpy as np
 from pathlib import Path
 
 from arc_solver.step3_learn import learn_from_pairs
@@ -7,29 +7,68 @@ from arc_solver.step5_transforms import rotate90, flip_x, flip_y  # kept availab
 from arc_solver.step7_autolearn import update_memory
 from arc_solver.step12_self_corrector import apply_self_correction
 from arc_solver.step18_meta_replay import record_replay
-from arc_solver.step23_meta_ensemble import ensemble_predict
+from arc_solver.step23_meta_ensemble import ensemble_predict, collect_candidate_maps, candidate_fingerprint
+from arc_solver.state_store import load_state, save_state
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 CACHE_PATH = WORK / "cache.json"
+FREEZE_CONF = 1.0   # tasks whose top variants fit every train pair are not re-solved
 
 def _load_json(path: Path):
-    try:
-        if path.exists():
-            with open(path) as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return {}
-
-def _save_json(path: Path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-
-def solve_task(task: dict):
-    """Main solver: learn/cache/self-correct, then predict via meta-ensemble."""
+    return load_state(path, {})
+
+def _save_json(path: Path, data, keys=None):
+    save_state(path, data, keys)
+
+def new_updates() -> dict:
+    """Empty container for state writes deferred by a parallel worker."""
+    return {"cache": {}, "memory": [], "replay": []}
+
+@timed("apply_updates")
+def apply_updates(updates: dict):
+    """Persist state writes collected by solve_task(updates=...), in order."""
+    if updates.get("cache"):
+        cache = _load_json(CACHE_PATH)
+        cache.update(updates["cache"])
+        _save_json(CACHE_PATH, cache, keys=updates["cache"].keys())
+    for rule_type, conf in updates.get("memory", []):
+        update_memory(rule_type, conf)
+    for rule_type, cmap, conf in updates.get("replay", []):
+        record_replay(rule_type, cmap, conf)
+
+def _log_result(base_map: dict, mean_conf: float, updates: dict = None):
+    """Autolearn + replay log of one solve (deferred into `updates` if given)."""
+    if updates is not None:
+        updates["memory"].append(("meta_ensemble", mean_conf))
+        updates["replay"].append(("meta_ensemble", base_map, mean_conf))
+        return
+    update_memory("meta_ensemble", mean_conf)
+    # store the base_map to replay so it can be promoted/diversified later
+    record_replay("meta_ensemble", base_map, mean_conf)
+
+@timed("solve_task")
+def solve_task(task: dict, updates: dict = None, record: dict = None):
+    """
+    Main solver: learn/cache/self-correct, then predict via meta-ensemble.
+    If `updates` is given, cache/memory/replay writes are collected into it
+    instead of being persisted (see apply_updates).
+
+    With `record` (a dict kept by the caller between cycles) the solve is
+    incremental: the fingerprint of the task's candidate pool (cached rule,
+    rehearse/meta entries, replay) is stored in it along with the result, and
+    a later call whose pool is unchanged reuses that result; a frozen record
+    (perfect train fit) is always reused.  record["status"] reports which
+    case applied.  Reused results are still logged to memory and replay.
+    """
     cache = _load_json(CACHE_PATH)
     task_id = task.get("id", "unknown")
 
+    if record is not None and record.get("frozen"):
+        record["status"] = "frozen"
+        _log_result(record["base_map"], record["conf"], updates)
+        return list(record["preds"]), record["conf"]
+
     # 1) get/learn base rule
     if task_id in cache:
         rule = cache[task_id]
@@ -38,12 +77,25 @@ def solve_task(task: dict):
         result = learn_from_pairs(task.get("train", []))
         rule = result["best_rule"]
         cache[task_id] = rule
-        _save_json(CACHE_PATH, cache)
+        if updates is None:
+            _save_json(CACHE_PATH, cache, keys=[task_id])
+        else:
+            updates["cache"][task_id] = rule
         print(f"[CACHE] Stored rule for {task_id[:8]} conf={rule.get('confidence', 0)}")
         print(f"[SOLVE] Learned new rule type={rule.get('type','unknown')} (meta_refresh=True)")
 
-    # 2) optional self-correction over training pairs
     base_map = rule.get("color_map", {})
+    cands = None
+    if record is not None:
+        cands = collect_candidate_maps(task_id, cache=cache)
+        fp = candidate_fingerprint(cands)
+        if record.get("fp") == fp:
+            record["status"] = "reused"
+            print(f"[INCR] Reusing result for {task_id[:8]} (inputs unchanged)")
+            _log_result(base_map, record["conf"], updates)
+            return list(record["preds"]), record["conf"]
+
+    # 2) optional self-correction over training pairs
     fixes = apply_self_correction(task, [base_map])
     if fixes:
         print(f"[CORRECT] Applied {len(fixes)} fixes.")
@@ -51,11 +103,13 @@ def solve_task(task: dict):
         print("[CORRECT] No fixes applied.")
 
     # 3) produce predictions with meta-ensemble (uses cache/meta/replay/rehearse)
-    preds_all, mean_conf = ensemble_predict(task, topk=2)
+    preds_all, mean_conf, top_scores = ensemble_predict(task, topk=2, cache=cache, cands=cands,
+                                                        return_scores=True)
 
-    # 4) autolearn + replay log
-    update_memory("meta_ensemble", mean_conf)
-    # store the base_map to replay so it can be promoted/diversified later
-    record_replay("meta_ensemble", base_map, mean_conf)
+    if record is not None:
+        record.update(status="recomputed", fp=fp, preds=preds_all, conf=mean_conf,
+                      base_map=base_map, frozen=bool(top_scores) and min(top_scores) >= FREEZE_CONF)
 
+    # 4) autolearn + replay log
+    _log_result(base_map, mean_conf, updates)
     return preds_all, mean_conf
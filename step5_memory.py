@@ -4,20 +4,32 @@
 import json
 from pathlib import Path
 import numpy as np
+from arc_solver.state_store import load_state, save_state, discard_state
+from arc_solver.step0_stats import new_stats, push, from_values
 
 MEMORY_PATH = Path(__file__).parent / "solver_memory.json"
+_checked = None   # memory object already migrated (load_state returns the live one)
+
+def _migrate(mem: dict) -> bool:
+    """Replace legacy per-type "records" lists by streaming stats (step0_stats)."""
+    changed = False
+    for entry in mem.values():
+        if isinstance(entry, dict) and "records" in entry:
+            entry["stats"] = from_values(entry.pop("records"))
+            changed = True
+    return changed
 
 def load_memory() -> dict:
-    """Load or initialize memory."""
-    if MEMORY_PATH.exists():
-        try:
-            with open(MEMORY_PATH) as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return data
-        except Exception:
-            pass
-    return {}
+    """Load or initialize memory (migrating legacy records on first load)."""
+    global _checked
+    data = load_state(MEMORY_PATH, {})
+    if not isinstance(data, dict):
+        return {}
+    if data is not _checked:
+        if _migrate(data):
+            save_state(MEMORY_PATH, data)
+        _checked = data
+    return data
 
 def save_memory(mem: dict):
     """Persist memory safely with NumPy-compatible types."""
@@ -28,9 +40,11 @@ def save_memory(mem: dict):
             return float(obj)
         return obj
 
+    global _checked
     serializable = json.loads(json.dumps(mem, default=_convert))
-    with open(MEMORY_PATH, "w") as f:
-        json.dump(serializable, f, indent=2)
+    save_state(MEMORY_PATH, serializable)
+    if _checked is mem:
+        _checked = serializable
 
 def update_memory(rule: dict):
     """Update memory and compute transferable weights."""
@@ -40,11 +54,10 @@ def update_memory(rule: dict):
     conf = float(rule.get("confidence", 0.0))
 
     if rtype not in mem:
-        mem[rtype] = {"records": [], "mean_conf": 0.0, "color_map": {}}
+        mem[rtype] = {"stats": new_stats(), "mean_conf": 0.0, "color_map": {}}
 
-    recs = mem[rtype]["records"]
-    recs.append(conf)
-    mem[rtype]["mean_conf"] = round(float(np.mean(recs)), 3)
+    stats = push(mem[rtype].setdefault("stats", new_stats()), conf)
+    mem[rtype]["mean_conf"] = round(stats["mean"], 3)
 
     # merge color maps from past runs for transfer learning
     stored_cmap = mem[rtype].get("color_map", {})
@@ -53,7 +66,7 @@ def update_memory(rule: dict):
     mem[rtype]["color_map"] = stored_cmap
 
     save_memory(mem)
-    print(f"[MEM] Updated {rtype}: {mem[rtype]['mean_conf']:.3f} (records={len(recs)})")
+    print(f"[MEM] Updated {rtype}: {mem[rtype]['mean_conf']:.3f} (records={stats['count']})")
 
 def get_best_color_map(rule_type: str):
     """Retrieve most recent color map for reuse."""
@@ -74,6 +87,7 @@ def summarize_memory() -> float:
 
 def clear_memory():
     """Reset solver memory."""
+    discard_state(MEMORY_PATH)
     if MEMORY_PATH.exists():
         MEMORY_PATH.unlink()
         print("[MEM] Memory cleared.")
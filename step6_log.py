@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 # step6_log.py — persistent observer event logger
 
-import json
 from pathlib import Path
 from datetime import datetime
+from arc_solver.ledger_writer import append_event
 
 LOG_PATH = Path(__file__).parent / "observer_ledger.jsonl"
 
@@ -14,8 +14,7 @@ def log_rule(rule: dict):
         "type": "rule",
         **rule
     }
-    with open(LOG_PATH, "a") as f:
-        f.write(json.dumps(event) + "\n")
+    append_event(LOG_PATH, event)
 
 def log_prediction(task_id: int, pred, target):
     """Append a prediction comparison entry."""
@@ -26,5 +25,4 @@ def log_prediction(task_id: int, pred, target):
         "pred": pred,
         "target": target
     }
-    with open(LOG_PATH, "a") as f:
-        f.write(json.dumps(event) + "\n")
+    append_event(LOG_PATH, event)
@@ -1,25 +1,20 @@
 #!/usr/bin/env python3
 # step6_meta_observer.py — meta-weights controller with adaptive reinforcement
 
-import json
 from pathlib import Path
 from datetime import datetime
+from arc_solver.state_store import load_state, save_state
+from arc_solver.ledger_writer import append_event
+from arc_solver.ledger_aggregates import ledger_aggregates
 
 META_PATH = Path(__file__).parent / "meta_weights.json"
 FEEDBACK_LOG = Path(__file__).parent / "meta_feedback.jsonl"
 
 def _load_weights():
-    if META_PATH.exists():
-        try:
-            with open(META_PATH) as f:
-                return json.load(f)
-        except Exception:
-            pass
-    return {"color_map": 1.0, "geom": 1.0, "none": 1.0, "unknown": 1.0}
+    return load_state(META_PATH, {"color_map": 1.0, "geom": 1.0, "none": 1.0, "unknown": 1.0})
 
 def _save_weights(weights: dict):
-    with open(META_PATH, "w") as f:
-        json.dump(weights, f, indent=2)
+    save_state(META_PATH, weights)
 
 def log_feedback(rule_type: str, confidence: float):
     """Record performance feedback."""
@@ -28,26 +23,12 @@ def log_feedback(rule_type: str, confidence: float):
         "rule_type": rule_type,
         "confidence": float(confidence),
     }
-    with open(FEEDBACK_LOG, "a") as f:
-        f.write(json.dumps(event) + "\n")
+    append_event(FEEDBACK_LOG, event)
 
-def _aggregate_feedback():
-    """Compute average confidence per rule type from feedback log."""
-    scores = {}
-    counts = {}
-    if not FEEDBACK_LOG.exists():
-        return {}
-    with open(FEEDBACK_LOG) as f:
-        for line in f:
-            try:
-                ev = json.loads(line)
-                t = ev["rule_type"]
-                c = ev["confidence"]
-                scores[t] = scores.get(t, 0.0) + c
-                counts[t] = counts.get(t, 0) + 1
-            except Exception:
-                continue
-    return {t: round(scores[t] / counts[t], 3) for t in scores}
+def _aggregate_feedback(since=None, until=None):
+    """Compute average confidence per rule type from feedback log (optionally a time range)."""
+    aggs = ledger_aggregates(FEEDBACK_LOG, strict=True, since=since, until=until)
+    return {t: round(rec["sum"] / rec["count"], 3) for t, rec in aggs.items()}
 
 def update_meta_weights():
     """Update weights using feedback-based reinforcement."""
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
-import json, random
-import numpy as np
+import random
 from datetime import datetime
 from pathlib import Path
+from arc_solver.state_store import load_state, save_state
+from arc_solver.ledger_writer import append_event
+from arc_solver.ledger_aggregates import ledger_aggregates
+from arc_solver.instrument import timed
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 MEM_PATH = WORK / "memory.json"
@@ -10,44 +13,34 @@ LEDGER_PATH = WORK / "ledger.json"
 WEIGHTS_PATH = WORK / "meta_weights.json"
 
 def _load_json(path: Path):
-    if not path.exists():
-        return {}
-    try:
-        with open(path) as f:
-            return json.load(f)
-    except Exception:
-        return {}
+    return load_state(path, {})
 
-def _save_json(path: Path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+def _save_json(path: Path, data, keys=None):
+    save_state(path, data, keys)
 
+@timed("update_memory")
 def update_memory(rule_type: str, confidence: float):
     mem = _load_json(MEM_PATH)
     rec = mem.get(rule_type, {"count": 0, "mean": 0.0})
     rec["count"] += 1
     rec["mean"] = round((rec["mean"] * (rec["count"] - 1) + confidence) / rec["count"], 3)
     mem[rule_type] = rec
-    _save_json(MEM_PATH, mem)
+    _save_json(MEM_PATH, mem, keys=[rule_type])
     print(f"[AUTOLEARN] Memory updated {rule_type}: mean={rec['mean']:.3f}, n={rec['count']}")
 
 def log_event(rule_type: str, confidence: float):
     entry = {"time": datetime.utcnow().isoformat(), "rule_type": rule_type, "confidence": confidence}
-    with open(LEDGER_PATH, "a") as f:
-        f.write(json.dumps(entry) + "\n")
+    append_event(LEDGER_PATH, entry)
 
-def summarize_ledger():
+@timed("summarize_ledger")
+def summarize_ledger(since=None, until=None):
     try:
-        with open(LEDGER_PATH) as f:
-            lines = [json.loads(x) for x in f if x.strip()]
-        grouped = {}
-        for e in lines:
-            r = e["rule_type"]
-            grouped.setdefault(r, []).append(e["confidence"])
-        return {r: round(float(np.mean(vals)), 3) for r, vals in grouped.items()}
+        aggs = ledger_aggregates(LEDGER_PATH, strict=True, since=since, until=until)
+        return {r: round(rec["sum"] / rec["count"], 3) for r, rec in aggs.items()}
     except Exception:
         return {}
 
+@timed("update_meta_weights")
 def update_meta_weights():
     weights = _load_json(WEIGHTS_PATH) or {"color_map": 1.0, "none": 1.0, "unknown": 1.0}
     weights["color_map"] = round(weights["color_map"] * random.uniform(0.95, 1.05), 3)
@@ -56,13 +49,7 @@ def update_meta_weights():
     print(f"[AUTOLEARN] Meta weights → {weights}")
 
 def get_rule_weights():
-    if WEIGHTS_PATH.exists():
-        try:
-            with open(WEIGHTS_PATH) as f:
-                return json.load(f)
-        except Exception:
-            pass
-    return {"color_map": 1.0, "none": 1.0, "unknown": 1.0}
+    return _load_json(WEIGHTS_PATH) or {"color_map": 1.0, "none": 1.0, "unknown": 1.0}
 
 # === NEW: Dynamic confidence scaling ===
 def adjust_confidence(current_conf: float, rule_type: str) -> float:
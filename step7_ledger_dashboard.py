@@ -4,46 +4,23 @@
 import json
 from pathlib import Path
 from datetime import datetime
-from statistics import mean
 from arc_solver.step5_memory import load_memory, summarize_memory
+from arc_solver.ledger_aggregates import ledger_aggregates, mean
 
 LEDGER_PATH = Path(__file__).parent / "observer_ledger.jsonl"
 SUMMARY_PATH = Path(__file__).parent / "ledger_summary.json"
 
-def _read_ledger():
-    """Read observer events if available."""
-    if not LEDGER_PATH.exists():
-        return []
-    lines = []
+def _aggregate_observer(since=None, until=None):
+    """Mean confidence per rule type (running aggregates of the observer ledger)."""
     try:
-        with open(LEDGER_PATH) as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    lines.append(json.loads(line))
-                except Exception:
-                    continue
+        aggs = ledger_aggregates(LEDGER_PATH, since=since, until=until)
     except Exception:
-        pass
-    return lines
+        return {}
+    return {k: round(mean(rec), 3) for k, rec in aggs.items()}
 
-def _aggregate_observer(events):
-    """Aggregate mean confidence per rule type."""
-    buckets = {}
-    for e in events:
-        rtype = e.get("rule_type", "unknown")
-        conf = float(e.get("confidence", 0.0))
-        if rtype not in buckets:
-            buckets[rtype] = []
-        buckets[rtype].append(conf)
-    return {k: round(mean(v), 3) for k, v in buckets.items()} if buckets else {}
-
-def build_summary():
-    """Generate combined summary of memory and observer state."""
-    obs_events = _read_ledger()
-    obs_summary = _aggregate_observer(obs_events)
+def build_summary(since=None, until=None):
+    """Generate combined summary of memory and observer state (observer: optional time range)."""
+    obs_summary = _aggregate_observer(since, until)
     mem = load_memory()
     mem_summary = {k: v.get("mean_conf", 0.0) for k, v in mem.items()}
     combined_mean = summarize_memory()
@@ -1,33 +1,37 @@
 #!/usr/bin/env python3
 # step7_task_memory.py — persistent per-task learning memory
 
-import json
 from pathlib import Path
 from statistics import mean
+from arc_solver.state_store import load_state, save_state
+from arc_solver.step0_stats import new_stats, push, from_values
 
 MEMORY_PATH = Path(__file__).parent / "task_memory.json"
+_checked = None   # memory object already migrated (load_state returns the live one)
 
 def _load():
-    if not MEMORY_PATH.exists():
-        return {}
-    try:
-        with open(MEMORY_PATH) as f:
-            return json.load(f)
-    except Exception:
-        return {}
+    global _checked
+    data = load_state(MEMORY_PATH, {})
+    if data is not _checked:
+        # legacy "confidences" lists → streaming stats (step0_stats)
+        legacy = [k for k, r in data.items() if isinstance(r, dict) and "confidences" in r]
+        for k in legacy:
+            data[k]["stats"] = from_values(data[k].pop("confidences"))
+        if legacy:
+            _save(data, keys=legacy)
+        _checked = data
+    return data
 
-def _save(data):
-    with open(MEMORY_PATH, "w") as f:
-        json.dump(data, f, indent=2)
+def _save(data, keys=None):
+    save_state(MEMORY_PATH, data, keys)
 
 def record_task_result(task_id: str, rule_type: str, confidence: float):
     """Store or update task memory."""
     memory = _load()
-    rec = memory.get(task_id, {"rule_type": rule_type, "confidences": []})
-    rec["confidences"].append(confidence)
-    rec["mean_conf"] = round(mean(rec["confidences"]), 3)
+    rec = memory.get(task_id, {"rule_type": rule_type, "stats": new_stats()})
+    rec["mean_conf"] = round(push(rec["stats"], confidence)["mean"], 3)
     memory[task_id] = rec
-    _save(memory)
+    _save(memory, keys=[task_id])
     print(f"[MEM] Updated {task_id}: {rec['mean_conf']}")
     return rec["mean_conf"]
 
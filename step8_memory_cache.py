@@ -6,6 +6,7 @@ step8_memory_cache.py — persistent cache of rules including color_map for meta
 import json
 from pathlib import Path
 from hashlib import sha1
+from arc_solver.state_store import load_state, save_state
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 CACHE_PATH = WORK / "cache.json"
@@ -19,16 +20,10 @@ def _hash_task(task: dict) -> str:
     return sha1(s.encode()).hexdigest()[:8]
 
 def _load_cache() -> dict:
-    if CACHE_PATH.exists():
-        try:
-            return json.loads(CACHE_PATH.read_text())
-        except Exception:
-            return {}
-    return {}
+    return load_state(CACHE_PATH, {})
 
-def _save_cache(cache: dict):
-    with open(CACHE_PATH, "w") as f:
-        json.dump(cache, f, indent=2)
+def _save_cache(cache: dict, keys=None):
+    save_state(CACHE_PATH, cache, keys)
 
 def get_cached_rule(task: dict):
     key = _hash_task(task)
@@ -50,5 +45,5 @@ def update_cache(task: dict, rule: dict, conf: float):
             "confidence": round(float(conf), 3)
         }
     }
-    _save_cache(cache)
+    _save_cache(cache, keys=[key])
     print(f"[CACHE] Stored rule for {key} conf={conf:.2f}")
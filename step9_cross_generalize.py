@@ -1,66 +1,193 @@
 #!/usr/bin/env python3
 # step9_cross_generalize.py — cross-task rule generalization and reuse
 
-import json
 import numpy as np
 from pathlib import Path
 from hashlib import sha1
+from typing import List, Tuple
+from arc_solver.state_store import STORE, load_state, save_state, add_flush_hook
+from arc_solver.step0_features import features
+from arc_solver.step0_colormap import as_colormap
 
 WORK = Path("/data/data/com.termux/files/home/arc_solver")
 BANK_PATH = WORK / "rule_bank.json"
+INDEX_PATH = WORK / "rule_bank_index.npz"   # fingerprint matrix for the bank
+SIM_THRESHOLD = 0.98   # fingerprint cosine needed to merge with a banked rule
+LEGACY_THRESHOLD = 0.75   # signature match needed for bank entries without a fingerprint
+TOPK = 5
 
 def _hash_grid(grid):
-    """Stable SHA1 hash of flattened grid."""
-    flat = np.array(grid, dtype=np.int64).flatten()
-    return sha1(flat.tobytes()).hexdigest()[:8]
+    """Stable SHA1 hash of flattened grid (memoized per grid in the feature store)."""
+    # hashed as int64 so signatures already stored in rule_bank.json stay valid
+    return features(grid).derive("sha1_8", lambda a: sha1(a.astype(np.int64).tobytes()).hexdigest()[:8])
 
 def task_signature(task):
     """Generate a compact signature based on its training pairs."""
     parts = []
     for pair in task.get("train", []):
-        inp, out = np.array(pair["input"]), np.array(pair["output"])
-        parts.append(_hash_grid(inp))
-        parts.append(_hash_grid(out))
+        parts.append(_hash_grid(pair["input"]))
+        parts.append(_hash_grid(pair["output"]))
     return sha1("".join(parts).encode()).hexdigest()[:12]
 
-def _load_bank():
-    if BANK_PATH.exists():
+# ---------------- numeric task fingerprints ----------------
+FP_DIM = 10 + 10 + 4 + 2 + 100
+
+def task_fingerprint(task) -> np.ndarray:
+    """
+    Fixed-length description of a task's train pairs, comparable by cosine:
+      input / output color histograms (10 + 10, normalized),
+      shape ratios (mean out/in height, out/in width, input aspect, same-shape share),
+      object counts (mean log1p of input / output objects),
+      input→output color co-occurrence over same-shape pairs (10×10, normalized).
+    Each block is scaled to unit length, so the cosine of two fingerprints is
+    the mean of the per-block cosines rather than being dominated by one block.
+    """
+    hin, hout, cooc = np.zeros(10), np.zeros(10), np.zeros(100)
+    shape, objs = np.zeros(4), np.zeros(2)
+    pairs = task.get("train", [])
+    for pair in pairs:
+        fi, fo = features(pair["input"]), features(pair["output"])
+        hin += fi.hist / max(1, fi.array.size)
+        hout += fo.hist / max(1, fo.array.size)
+        (ih, iw), (oh, ow) = fi.shape, fo.shape
+        shape += (oh / max(1, ih), ow / max(1, iw), ih / max(1, iw), fi.shape == fo.shape)
+        objs += (np.log1p(len(fi.objects)), np.log1p(len(fo.objects)))
+        if fi.shape == fo.shape:
+            a, b = np.asarray(fi.array).ravel(), np.asarray(fo.array).ravel()
+            cooc += np.bincount(a * np.intp(10) + b, minlength=100) / a.size
+    blocks = [hin, hout, shape, objs, cooc]
+    return np.concatenate([b / max(np.linalg.norm(b), 1e-12) for b in blocks]).astype(np.float32)
+
+class FingerprintIndex:
+    """Cosine top-k over unit-normalized fingerprint rows, one per bank signature."""
+
+    def __init__(self, sigs: List[str] = None, matrix: np.ndarray = None):
+        self.sigs: List[str] = list(sigs or [])
+        self.pos = {s: i for i, s in enumerate(self.sigs)}
+        self._m = np.zeros((max(16, len(self.sigs)), FP_DIM), dtype=np.float32)
+        if matrix is not None and len(self.sigs):
+            self._m[:len(self.sigs)] = matrix
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.sigs)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._m[:len(self.sigs)]
+
+    def add(self, sig: str, vec: np.ndarray):
+        norm = float(np.linalg.norm(vec))
+        row = vec / norm if norm > 0 else vec
+        i = self.pos.get(sig)
+        if i is None:
+            i = len(self.sigs)
+            if i == len(self._m):
+                self._m = np.concatenate([self._m, np.zeros_like(self._m)])
+            self.sigs.append(sig)
+            self.pos[sig] = i
+        self._m[i] = row
+        self.dirty = True
+
+    def query(self, vec: np.ndarray, k: int = TOPK) -> List[Tuple[str, float]]:
+        """(signature, cosine similarity) of the k nearest rows, best first."""
+        n = len(self.sigs)
+        norm = float(np.linalg.norm(vec))
+        if not n or norm == 0:
+            return []
+        sims = self.matrix @ (vec / norm).astype(np.float32)
+        k = min(k, n)
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.lexsort((top, -sims[top]))]   # by similarity, then insertion order
+        return [(self.sigs[i], float(sims[i])) for i in top]
+
+_INDEX = None
+_LEGACY = None   # bank signatures banked before the index existed (no fingerprint)
+
+def _get_index() -> FingerprintIndex:
+    global _INDEX
+    if _INDEX is None:
         try:
-            with open(BANK_PATH) as f:
-                return json.load(f)
+            with np.load(INDEX_PATH) as z:
+                _INDEX = FingerprintIndex([str(s) for s in z["sigs"]], z["matrix"])
         except Exception:
-            pass
-    return {}
+            _INDEX = FingerprintIndex()
+    return _INDEX
+
+def flush_index():
+    """Persist the fingerprint index next to rule_bank.json (if it changed)."""
+    if _INDEX is None or not _INDEX.dirty or STORE.read_only:
+        return
+    tmp = INDEX_PATH.with_name(INDEX_PATH.name + ".tmp.npz")
+    np.savez(tmp, sigs=np.array(_INDEX.sigs, dtype=str), matrix=_INDEX.matrix)
+    tmp.replace(INDEX_PATH)
+    _INDEX.dirty = False
+
+add_flush_hook(flush_index)   # persisted with rule_bank.json at every full flush
+
+def similar_tasks(task, k: int = TOPK) -> List[Tuple[str, float]]:
+    """Other banked signatures most similar to `task` (cosine over task fingerprints)."""
+    bank = _load_bank()
+    own = task_signature(task)
+    hits = _get_index().query(task_fingerprint(task), k + 1)   # +1: the task itself may be banked
+    return [(s, sim) for s, sim in hits if s in bank and s != own][:k]
+
+def _legacy_sigs(bank, index: FingerprintIndex) -> List[str]:
+    """Bank signatures with no fingerprint (banked before the index); logged once."""
+    global _LEGACY
+    if _LEGACY is None:
+        _LEGACY = [s for s in bank if s not in index.pos]
+        if _LEGACY:
+            print(f"[GENERALIZE] {len(_LEGACY)} banked rules have no fingerprint; matching them by signature")
+    return _LEGACY
+
+def _signature_sim(a: str, b: str) -> float:
+    """Share of equal characters of two 12-char task signatures (the pre-index match)."""
+    return sum(x == y for x, y in zip(a, b)) / 12
+
+def _load_bank():
+    return load_state(BANK_PATH, {})
 
-def _save_bank(bank):
-    with open(BANK_PATH, "w") as f:
-        json.dump(bank, f, indent=2)
+def _save_bank(bank, keys=None):
+    save_state(BANK_PATH, bank, keys)
 
 def generalize_rule(task, new_rule):
-    """Blend with best previous rule based on similarity of signatures."""
+    """Blend with the most similar banked rule (nearest task fingerprint)."""
     bank = _load_bank()
     sig = task_signature(task)
+    vec = task_fingerprint(task)
+    index = _get_index()
     if not bank:
         bank[sig] = new_rule
-        _save_bank(bank)
+        _save_bank(bank, keys=[sig])
+        index.add(sig, vec)
         return new_rule
 
-    # compute hash distance (Hamming on first 12 chars)
+    # nearest banked task by fingerprint cosine similarity
     best_sig, best_rule, best_score = None, None, 0
-    for s, r in bank.items():
-        sim = sum(a == b for a, b in zip(sig, s)) / 12
-        if sim > best_score:
-            best_score, best_sig, best_rule = sim, s, r
+    for s, sim in index.query(vec, TOPK):
+        if s in bank:
+            best_score, best_sig, best_rule = sim, s, bank[s]
+            break
+    merge = best_rule is not None and best_score > SIM_THRESHOLD
+    if not merge:
+        # entries without a fingerprint are still compared the way they used to be
+        legacy = [(s, _signature_sim(sig, s)) for s in _legacy_sigs(bank, index)
+                  if s in bank and s not in index.pos]
+        if legacy:
+            s, sim = max(legacy, key=lambda x: x[1])
+            if sim > LEGACY_THRESHOLD:
+                best_score, best_sig, best_rule, merge = sim, s, bank[s], True
 
-    if best_rule and best_score > 0.75:
+    if merge:
         # merge color maps
-        cmap_new = new_rule.get("color_map", {})
-        cmap_old = best_rule.get("color_map", {})
-        merged = {**cmap_old, **cmap_new}
-        new_rule["color_map"] = merged
+        cmap_new = as_colormap(new_rule.get("color_map", {}))
+        cmap_old = as_colormap(best_rule.get("color_map", {}))
+        new_rule["color_map"] = cmap_old.merge(cmap_new).to_dict()
         new_rule["type"] = new_rule.get("type", best_rule.get("type", "color_map"))
         print(f"[GENERALIZE] Merged rule from {best_sig} sim={best_score:.2f}")
 
     bank[sig] = new_rule
-    _save_bank(bank)
+    _save_bank(bank, keys=[sig])
+    index.add(sig, vec)
     return new_rule
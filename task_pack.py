@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# task_pack.py — memory-mapped binary task pack
+#
+# All grids of the merged dataset are stored as packed uint8 blobs in one
+# file, followed by a JSON index (task ids, per-pair blob offsets and shapes)
+# and a fixed footer:
+#
+#   MAGIC | grid blobs ... | index JSON | <u64 index offset> <u64 index length> | MAGIC
+#
+# open_pack() mmaps the file; tasks are lazy, dict-like views whose grids are
+# read-only Grid views straight into the mapping (no parsing, no copies).
+# Tasks pickle as (pack path, position), so pool workers reopen the pack and
+# share its pages instead of receiving a serialized copy of every grid.
+#
+#   python -m arc_solver.task_pack        # (re)build the pack from the merged store
+
+import os
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+from arc_solver.step0_grid import Grid, as_grid
+
+WORK = Path("/data/data/com.termux/files/home/arc_solver")
+PACK_PATH = WORK / "merged_dataset.pack"
+MAGIC = b"ARCPACK1"
+_FOOTER = struct.Struct("<QQ")
+_OPEN: Dict[str, "TaskPack"] = {}   # path -> pack opened in this process
+
+# ---------------- writing ----------------
+def build_pack(tasks: Iterable[Dict[str, Any]], path: Path = PACK_PATH, source: str = "") -> int:
+    """Write `tasks` to a pack file (atomically); returns the number of tasks."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    entries = []
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+
+        def blob(grid) -> List[int]:
+            if grid is None:
+                return [-1, 0, 0]
+            g = as_grid(grid)
+            offset = f.tell()
+            f.write(np.ascontiguousarray(g).tobytes())
+            return [offset, int(g.shape[0]), int(g.shape[1])]
+
+        for task in tasks:
+            pairs = {}
+            for split in ("train", "test"):
+                pairs[split] = [blob(p.get("input")) + blob(p.get("output")) for p in task.get(split, [])]
+            extra = {k: v for k, v in task.items() if k not in ("id", "train", "test")}
+            entries.append([task.get("id", "unknown"), pairs["train"], pairs["test"], extra])
+        index = json.dumps({"source": source, "tasks": entries}, separators=(",", ":")).encode("utf-8")
+        offset = f.tell()
+        f.write(index)
+        f.write(_FOOTER.pack(offset, len(index)))
+        f.write(MAGIC)
+    os.replace(tmp, path)
+    _OPEN.pop(str(path), None)
+    return len(entries)
+
+# ---------------- reading ----------------
+class Pair:
+    """Lazy view of one train/test pair: pair["input"], pair.get("output")."""
+    __slots__ = ("_pack", "_spec", "_in", "_out")
+
+    def __init__(self, pack: "TaskPack", spec: List[int]):
+        self._pack = pack
+        self._spec = spec
+        self._in = self._out = None
+
+    def _grid(self, at: int) -> Optional[Grid]:
+        offset, h, w = self._spec[at:at + 3]
+        return None if offset < 0 else self._pack.grid(offset, h, w)
+
+    def __getitem__(self, key: str) -> Grid:
+        if key == "input":
+            if self._in is None:
+                self._in = self._grid(0)
+            return self._in
+        if key == "output" and self._spec[3] >= 0:
+            if self._out is None:
+                self._out = self._grid(3)
+            return self._out
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return key == "input" or (key == "output" and self._spec[3] >= 0)
+
+    def keys(self) -> List[str]:
+        return ["input", "output"] if self._spec[3] >= 0 else ["input"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: self[k].tolist() for k in self.keys()}
+
+class Task:
+    """Lazy, dict-like view of one packed task (id / train / test / extra keys)."""
+    __slots__ = ("_pack", "_pos", "_train", "_test")
+
+    def __init__(self, pack: "TaskPack", pos: int):
+        self._pack = pack
+        self._pos = pos
+        self._train = self._test = None
+
+    @property
+    def _entry(self):
+        return self._pack._tasks[self._pos]
+
+    def __getitem__(self, key: str):
+        entry = self._entry
+        if key == "id":
+            return entry[0]
+        if key == "train":
+            if self._train is None:
+                self._train = [Pair(self._pack, s) for s in entry[1]]
+            return self._train
+        if key == "test":
+            if self._test is None:
+                self._test = [Pair(self._pack, s) for s in entry[2]]
+            return self._test
+        return entry[3][key]
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return key in ("id", "train", "test") or key in self._entry[3]
+
+    def keys(self) -> List[str]:
+        return ["id", "train", "test"] + list(self._entry[3])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain JSON-ready copy of the task."""
+        return {"id": self["id"], "train": [p.to_dict() for p in self["train"]],
+                "test": [p.to_dict() for p in self["test"]], **self._entry[3]}
+
+    def __reduce__(self):
+        return (_task_at, (str(self._pack.path), self._pos))
+
+    def __repr__(self) -> str:
+        return f"Task({self['id']!r}, train={len(self._entry[1])}, test={len(self._entry[2])})"
+
+class TaskPack:
+    """An mmap-ed pack file: a re-iterable, indexable sequence of Task views."""
+
+    def __init__(self, path: Path = PACK_PATH):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        tail = len(MAGIC) + _FOOTER.size
+        if self._mm[:len(MAGIC)] != MAGIC or self._mm[-len(MAGIC):] != MAGIC:
+            raise ValueError(f"{self.path.name} is not a task pack")
+        offset, length = _FOOTER.unpack(self._mm[-tail:-len(MAGIC)])
+        index = json.loads(self._mm[offset:offset + length])
+        self.source = index.get("source", "")
+        self._tasks = index["tasks"]
+        self._pos = {entry[0]: i for i, entry in enumerate(self._tasks)}
+
+    def grid(self, offset: int, h: int, w: int) -> Grid:
+        a = np.frombuffer(self._mm, dtype=np.uint8, count=h * w, offset=offset)
+        return a.reshape(h, w).view(Grid)   # read-only: the mapping is ACCESS_READ
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __getitem__(self, key) -> Task:
+        return Task(self, self._pos[key] if isinstance(key, str) else key)
+
+    def __iter__(self) -> Iterator[Task]:
+        for i in range(len(self._tasks)):
+            yield Task(self, i)
+
+    def ids(self) -> List[str]:
+        return [entry[0] for entry in self._tasks]
+
+    def __reduce__(self):
+        return (open_pack, (str(self.path),))
+
+def open_pack(path: Path = PACK_PATH) -> TaskPack:
+    """Open (or reuse this process's mapping of) a pack file."""
+    key = str(path)
+    pack = _OPEN.get(key)
+    if pack is None:
+        pack = _OPEN[key] = TaskPack(Path(path))
+    return pack
+
+def _task_at(path: str, pos: int) -> Task:
+    return Task(open_pack(path), pos)
+
+def pack_source(path: Path = PACK_PATH) -> Optional[str]:
+    """Source stamp recorded in a pack (None if missing or unreadable)."""
+    try:
+        return open_pack(path).source if Path(path).exists() else None
+    except Exception:
+        return None
+
+if __name__ == "__main__":
+    from arc_solver.fetch_arc_datasets import ensure_pack
+    pack = ensure_pack(force=True)
+    print(f"[PACK] {len(pack) if pack is not None else 0} tasks → {PACK_PATH}")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# tracer.py — Chrome Trace Event timeline of a pipeline run (opt-in)
+#
+# ARC_TRACE=/path/trace.json records begin/end ("B"/"E") events for every
+# task, every instrumented stage (instrument.stage / @timed, which emit here
+# whether or not ARC_INSTRUMENT is on) and every state-file load, save and
+# write (state_store).  The file opens directly in chrome://tracing or
+# https://ui.perfetto.dev.
+#
+# Timestamps come from the system-wide monotonic clock, so events of pool
+# workers line up with the parent's.  Each process is its own track (pid),
+# named "main" or "worker N"; workers return their events through
+# drain()/merge() with each task's updates, as instrument does.
+# Disabled, span() returns a shared no-op context.
+
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+TRACE_PATH = os.environ.get("ARC_TRACE")
+ENABLED = bool(TRACE_PATH)
+_NULL = nullcontext()
+
+class Tracer:
+    """Per-process buffer of trace events."""
+
+    def __init__(self):
+        self._reset()
+        self.workers: Dict[int, int] = {}   # parent only: worker pid → track number
+        self.written = -1                    # events in the last file written
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.events: List[Dict[str, Any]] = []
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._reset()   # a forked worker returns only its own events
+
+    def emit(self, ph: str, name: str, cat: str, args: Dict[str, Any] = None):
+        self._check_fork()
+        ev = {"ph": ph, "name": name, "cat": cat, "ts": time.monotonic_ns() / 1000.0,
+              "pid": self._pid, "tid": threading.get_native_id()}
+        if args:
+            ev["args"] = args
+        with self._lock:
+            self.events.append(ev)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        self._check_fork()
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+    def merge(self, events: Optional[List[Dict[str, Any]]]):
+        if not events:
+            return
+        for ev in events:
+            self.workers.setdefault(ev["pid"], len(self.workers) + 1)
+        with self._lock:
+            self.events.extend(events)
+
+    def write(self, path: Path) -> int:
+        """Write the trace (process-name metadata first); returns events written."""
+        meta = [{"ph": "M", "name": "process_name", "pid": self._pid, "tid": 0, "args": {"name": "main"}}]
+        meta += [{"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": f"worker {n}"}}
+                 for pid, n in self.workers.items() if pid != self._pid]
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e["ts"])   # stable: B/E order kept on ties
+        with open(path, "w") as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f)
+        self.written = len(events)
+        return len(events)
+
+TRACER = Tracer()
+
+class _Span:
+    __slots__ = ("name", "cat", "args")
+
+    def __init__(self, name: str, cat: str, args: Dict[str, Any]):
+        self.name, self.cat, self.args = name, cat, args
+
+    def __enter__(self):
+        TRACER.emit("B", self.name, self.cat, self.args)
+        return self
+
+    def __exit__(self, *exc):
+        TRACER.emit("E", self.name, self.cat)
+        return False
+
+def span(name: str, cat: str = "stage", **args):
+    """Context manager recording a begin/end span (no-op when disabled)."""
+    return _Span(name, cat, args) if ENABLED else _NULL
+
+def begin(name: str, cat: str = "stage", **args):
+    TRACER.emit("B", name, cat, args)
+
+def end(name: str, cat: str = "stage"):
+    TRACER.emit("E", name, cat)
+
+def drain() -> Optional[List[Dict[str, Any]]]:
+    """Worker side: events to return to the parent (None when disabled)."""
+    return TRACER.drain() if ENABLED else None
+
+def merge(events: Optional[List[Dict[str, Any]]]):
+    TRACER.merge(events)
+
+def write_trace(path: str = None) -> int:
+    """Write the collected trace to `path` (default ARC_TRACE); returns events written."""
+    path = path or TRACE_PATH
+    if not ENABLED or not path or TRACER._pid != os.getpid() or TRACER.written == len(TRACER.events):
+        return 0
+    n = TRACER.write(Path(path))
+    print(f"[TRACE] {n} events written → {path}")
+    return n
+
+if ENABLED:
+    atexit.register(write_trace)   # main rewrites it at the end; this covers aborted runs